@@ -0,0 +1,209 @@
+"""Recall quality and read latency benchmarks for docpacks."""
+
+import time
+from typing import Sequence
+
+import numpy as np
+
+from docpack.index import VECTOR_DTYPES, dequantize, quantize, score
+from docpack.storage import DocPackStore
+
+
+def benchmark_recall(
+    store: DocPackStore,
+    k: int = 10,
+    queries: int = 100,
+    nprobes: Sequence[int] = (1, 2, 4, 8, 16, 32),
+    noise: float = 0.05,
+    seed: int = 0,
+    shortlists: Sequence[int] = (64, 128, 256, 512, 1024),
+) -> list[dict]:
+    """Compare approximate recall against the exact scan.
+
+    Queries are stored embeddings perturbed with Gaussian noise, so no
+    model is needed. The exact scan is the ground truth for recall@k.
+
+    Args:
+        store: Docpack to benchmark (uses its IVF or binary index if present)
+        k: Number of results per query
+        queries: Number of sampled queries
+        nprobes: IVF nprobe values to try
+        noise: Standard deviation of the per-dimension query noise
+        seed: Random seed for query sampling
+        shortlists: Binary index shortlist sizes to try
+
+    Returns:
+        One row per configuration with mode, setting, recall, mean_ms and p95_ms
+    """
+    _, matrix = store.vector_matrix()
+    if len(matrix) == 0:
+        return []
+
+    query_vectors = _sample_queries(matrix, store.vector_scales(), queries, noise, seed)
+    truth, exact_times = _run(store, query_vectors, k, exact=True)
+    rows = [_row("exact", None, truth, truth, exact_times)]
+
+    ann_index = store.get_metadata("ann_index")
+    if ann_index == "ivf":
+        for nprobe in nprobes:
+            found, times = _run(store, query_vectors, k, nprobe=nprobe)
+            rows.append(_row("ivf", f"nprobe={nprobe}", truth, found, times))
+    elif ann_index == "binary":
+        for shortlist in shortlists:
+            found, times = _run(store, query_vectors, k, shortlist=shortlist)
+            rows.append(_row("binary", f"shortlist={shortlist}", truth, found, times))
+    return rows
+
+
+def benchmark_dtypes(
+    store: DocPackStore,
+    k: int = 10,
+    queries: int = 100,
+    noise: float = 0.05,
+    seed: int = 0,
+) -> list[dict]:
+    """Compare vector storage dtypes against float32 for exact recall.
+
+    The docpack's vectors are converted in memory to every dtype in
+    VECTOR_DTYPES and scored the way ``DocPackStore.recall`` scores them.
+    The float32 scan is the ground truth; if the docpack is already
+    quantized, that is its dequantized matrix.
+
+    Args:
+        store: Docpack to benchmark
+        k: Number of results per query
+        queries: Number of sampled queries
+        noise: Standard deviation of the per-dimension query noise
+        seed: Random seed for query sampling
+
+    Returns:
+        One row per dtype with dtype, mb, recall, mean_ms and p95_ms
+    """
+    _, stored = store.vector_matrix()
+    if len(stored) == 0:
+        return []
+
+    base = dequantize(stored, store.vector_scales())
+    query_vectors = _sample_queries(base, None, queries, noise, seed)
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+
+    truth = None
+    rows = []
+    for dtype in VECTOR_DTYPES:
+        matrix, scales = quantize(base, dtype)
+        score(matrix, query_vectors[0], scales)  # warm up
+
+        found = []
+        times = []
+        for query in query_vectors:
+            start = time.perf_counter()
+            scores = score(matrix, query, scales)
+            top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+            times.append((time.perf_counter() - start) * 1000)
+            found.append(set(top.tolist()))
+        if truth is None:
+            truth = found
+
+        row = _row(dtype, None, truth, found, times)
+        row["dtype"] = row.pop("mode")
+        del row["setting"]
+        row["mb"] = (matrix.nbytes + (scales.nbytes if scales is not None else 0)) / 2**20
+        rows.append(row)
+    return rows
+
+
+def benchmark_reads(store: DocPackStore, files: int = 50, seed: int = 0) -> dict:
+    """Time whole-file reads of a sample of text files.
+
+    Each file is read twice: the first read inflates compressed content,
+    the second is served from the store's block cache.
+
+    Args:
+        store: Docpack to benchmark
+        files: Number of sampled files
+        seed: Random seed for file sampling
+
+    Returns:
+        Dict with files, first_ms and repeat_ms (mean per file)
+    """
+    paths = [f["path"] for f in store.list_files() if not f["is_binary"]]
+    if not paths:
+        return {"files": 0, "first_ms": 0.0, "repeat_ms": 0.0}
+    rng = np.random.default_rng(seed)
+    sample = [paths[i] for i in rng.choice(len(paths), min(files, len(paths)), replace=False)]
+
+    times = []
+    for _ in range(2):
+        start = time.perf_counter()
+        for path in sample:
+            store.read_file(path)
+        times.append((time.perf_counter() - start) * 1000 / len(sample))
+    return {"files": len(sample), "first_ms": times[0], "repeat_ms": times[1]}
+
+
+def format_dtype_report(rows: list[dict], k: int) -> str:
+    """Format dtype benchmark rows as a text table."""
+    lines = [f"{'dtype':<8} {'MB':>8} {f'recall@{k}':>10} {'mean ms':>9} {'p95 ms':>9}"]
+    for row in rows:
+        lines.append(
+            f"{row['dtype']:<8} {row['mb']:>8.2f} {row['recall']:>10.3f} "
+            f"{row['mean_ms']:>9.2f} {row['p95_ms']:>9.2f}"
+        )
+    return "\n".join(lines)
+
+
+def format_report(rows: list[dict], k: int) -> str:
+    """Format benchmark rows as a text table."""
+    lines = [f"{'mode':<8} {'setting':>14} {f'recall@{k}':>10} {'mean ms':>9} {'p95 ms':>9}"]
+    for row in rows:
+        setting = row["setting"] or "-"
+        lines.append(
+            f"{row['mode']:<8} {setting:>14} {row['recall']:>10.3f} "
+            f"{row['mean_ms']:>9.2f} {row['p95_ms']:>9.2f}"
+        )
+    return "\n".join(lines)
+
+
+def _sample_queries(
+    matrix: np.ndarray, scales: np.ndarray | None, queries: int, noise: float, seed: int
+) -> np.ndarray:
+    """Sample stored embeddings as queries, perturbed with Gaussian noise."""
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(matrix), min(queries, len(matrix)), replace=False)
+    query_vectors = dequantize(matrix[np.sort(picks)], scales)
+    return query_vectors + rng.normal(0, noise, query_vectors.shape).astype(np.float32)
+
+
+def _run(
+    store: DocPackStore, query_vectors: np.ndarray, k: int, **options
+) -> tuple[list[set[int]], list[float]]:
+    """Run every query through recall, returning result ids and timings."""
+    store.recall(query_vectors[0], limit=k, **options)  # load matrix and index
+
+    found = []
+    times = []
+    for query in query_vectors:
+        start = time.perf_counter()
+        results = store.recall(query, limit=k, **options)
+        times.append((time.perf_counter() - start) * 1000)
+        found.append({r["chunk_id"] for r in results})
+    return found, times
+
+
+def _row(
+    mode: str,
+    setting: str | None,
+    truth: list[set[int]],
+    found: list[set[int]],
+    times: list[float],
+) -> dict:
+    """Summarize one benchmark configuration."""
+    hits = sum(len(t & f) for t, f in zip(truth, found))
+    total = sum(len(t) for t in truth)
+    return {
+        "mode": mode,
+        "setting": setting,
+        "recall": hits / total if total else 1.0,
+        "mean_ms": float(np.mean(times)),
+        "p95_ms": float(np.percentile(times, 95)),
+    }
@@ -1,5 +1,93 @@
 """Chunking strategies for text processing."""
 
+from typing import Any, Iterator
+
+from docpack.chunkers.code_chunker import CodeChunker
 from docpack.chunkers.paragraph_chunker import ParagraphChunker
+from docpack.models import Chunk
+from docpack.protocols import ChunkingStrategy
+
+# Registry of available chunkers, most specific first; ParagraphChunker
+# handles everything and is the fallback
+_CHUNKERS: list[ChunkingStrategy] = [
+    CodeChunker(),
+    ParagraphChunker(),
+]
+
+
+def get_chunker(file_path: str, **options: Any) -> ChunkingStrategy:
+    """Find the chunker for a file, by its extension.
+
+    Args:
+        file_path: Path of the file to chunk
+        **options: Chunker settings (e.g. max_tokens, count_tokens). When
+            given, a new instance of the matching chunker is built with them.
+
+    Returns:
+        The first registered chunker that can handle the file
+    """
+    for chunker in _CHUNKERS:
+        can_handle = getattr(chunker, "can_handle", None)
+        if can_handle is None or can_handle(file_path):
+            return type(chunker)(**options) if options else chunker
+    return ParagraphChunker(**options)
+
+
+def register_chunker(chunker: ChunkingStrategy) -> None:
+    """Register a custom chunker (for plugins/extensions).
+
+    Registered chunkers take precedence over the built-in ones. A chunker
+    with a ``can_handle(file_path)`` method is used for the files it
+    accepts; one without it handles every file.
+
+    Args:
+        chunker: An object implementing the ChunkingStrategy protocol
+    """
+    _CHUNKERS.insert(0, chunker)
+
+
+class AutoChunker:
+    """Chunking strategy that picks a chunker per file via get_chunker.
+
+    Chunkers are built once per type with the given options, so this can
+    be handed to the freeze pipeline (and pickled to its workers) like any
+    single chunker.
+    """
+
+    def __init__(self, **options: Any):
+        """Initialize the chunker.
+
+        Args:
+            **options: Settings passed to every selected chunker
+        """
+        self.options = options
+        self._instances: dict[type, ChunkingStrategy] = {}
+
+    def chunk(self, text: str, file_path: str) -> list[Chunk]:
+        """Split text into chunks with the chunker for its file type."""
+        return self._for(file_path).chunk(text, file_path)
+
+    def iter_chunks(self, text: str, file_path: str) -> Iterator[Chunk]:
+        """Lazily yield chunks when the selected chunker can stream."""
+        chunker = self._for(file_path)
+        chunk = getattr(chunker, "iter_chunks", chunker.chunk)
+        yield from chunk(text, file_path)
+
+    def _for(self, file_path: str) -> ChunkingStrategy:
+        """Return the (cached) chunker for a file."""
+        chunker = get_chunker(file_path)
+        if not self.options:
+            return chunker
+        kind = type(chunker)
+        if kind not in self._instances:
+            self._instances[kind] = kind(**self.options)
+        return self._instances[kind]
+
 
-__all__ = ["ParagraphChunker"]
+__all__ = [
+    "get_chunker",
+    "register_chunker",
+    "AutoChunker",
+    "CodeChunker",
+    "ParagraphChunker",
+]
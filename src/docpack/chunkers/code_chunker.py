@@ -0,0 +1,292 @@
+"""Definition-aware chunking strategy for source code."""
+
+import ast
+import re
+import warnings
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from docpack.chunkers.paragraph_chunker import ParagraphChunker
+from docpack.models import Chunk
+
+PYTHON_EXTENSIONS = frozenset({".py", ".pyi"})
+
+# Line ends as Python's tokenizer counts them (not str.splitlines, which
+# also breaks on form feeds and other separators)
+_PYTHON_LINE_END = re.compile(r"\r\n?|\n")
+
+# Languages whose top-level definitions are delimited by braces
+BRACE_EXTENSIONS = frozenset({
+    ".c", ".h", ".cc", ".cpp", ".cxx", ".hh", ".hpp", ".hxx",
+    ".cs", ".java", ".kt", ".kts", ".scala", ".groovy", ".swift",
+    ".go", ".rs", ".dart", ".php",
+    ".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx",
+})
+
+
+class CodeChunker:
+    """Split source files on top-level definitions.
+
+    - Python is parsed with ``ast``: every top-level function or class
+      (with its decorators and leading comments) is one chunk, and runs of
+      other statements (imports, constants) are grouped together. Classes
+      that are too large are split into their methods.
+    - C-like languages are cut where the brace depth returns to zero, i.e.
+      between top-level functions, types and declarations.
+
+    Fragments under MIN_CHUNK_SIZE are merged into the next chunk, and
+    definitions over the maximum size are split with ParagraphChunker.
+    Python files that do not parse are cut by the brace scanner, which
+    falls back to blank lines at depth zero.
+    """
+
+    MAX_CHUNK_SIZE = ParagraphChunker.MAX_CHUNK_SIZE
+    MIN_CHUNK_SIZE = ParagraphChunker.MIN_CHUNK_SIZE
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        count_tokens: Optional[Callable[[str], int]] = None,
+    ):
+        """Initialize the chunker.
+
+        Args:
+            max_tokens: Maximum chunk length in tokens. None sizes chunks in
+                characters (MAX_CHUNK_SIZE).
+            count_tokens: Returns the token length of a text; required with
+                ``max_tokens``
+        """
+        self.fallback = ParagraphChunker(max_tokens, count_tokens)
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens
+
+    def can_handle(self, file_path: str) -> bool:
+        """Check if the file is source code in a supported language."""
+        suffix = Path(file_path).suffix.lower()
+        return suffix in PYTHON_EXTENSIONS or suffix in BRACE_EXTENSIONS
+
+    def chunk(self, text: str, file_path: str) -> list[Chunk]:
+        """Split source code into chunks with metadata.
+
+        Args:
+            text: The source code
+            file_path: Path to the source file (selects the language)
+
+        Returns:
+            List of Chunk objects with position information
+        """
+        return list(self.iter_chunks(text, file_path))
+
+    def iter_chunks(self, text: str, file_path: str) -> Iterator[Chunk]:
+        """Lazily yield the chunks of a source file.
+
+        Args:
+            text: The source code
+            file_path: Path to the source file (selects the language)
+
+        Yields:
+            Chunk objects with position information
+        """
+        if not text or not text.strip():
+            return
+
+        spans = None
+        if Path(file_path).suffix.lower() in PYTHON_EXTENSIONS:
+            spans = _python_spans(text, self._fits)
+        if spans is None:
+            spans = _brace_spans(text)
+
+        index = 0
+        for start, end in self._merge_small(text, spans):
+            if self._fits(text, start, end):
+                pieces = [(start, end)]
+            else:
+                pieces = self._split(text, start, end, file_path)
+            for piece_start, piece_end in pieces:
+                yield Chunk(
+                    text=text[piece_start:piece_end],
+                    file_path=file_path,
+                    chunk_index=index,
+                    start_char=piece_start,
+                    end_char=piece_end,
+                )
+                index += 1
+
+    def _split(
+        self, text: str, start: int, end: int, file_path: str
+    ) -> list[tuple[int, int]]:
+        """Split an oversized definition on its blank lines.
+
+        The paragraphs are packed back together while they fit, so a long
+        function becomes a few full-size chunks rather than many small ones.
+        """
+        pieces: list[tuple[int, int]] = []
+        for c in self.fallback.iter_chunks(text[start:end], file_path):
+            piece = (start + c.start_char, start + c.end_char)
+            if pieces and self._fits(text, pieces[-1][0], piece[1]):
+                pieces[-1] = (pieces[-1][0], piece[1])
+            else:
+                pieces.append(piece)
+        return pieces
+
+    def _fits(self, text: str, start: int, end: int) -> bool:
+        """Check whether a span is within the maximum chunk size."""
+        if self.max_tokens is None:
+            return end - start <= self.MAX_CHUNK_SIZE
+        return self.count_tokens(text[start:end]) <= self.max_tokens
+
+    def _merge_small(
+        self, text: str, spans: list[tuple[int, int]]
+    ) -> Iterator[tuple[int, int]]:
+        """Merge fragments under MIN_CHUNK_SIZE into the following span.
+
+        Spans are contiguous, so merging just extends the end offset.
+        Whitespace-only spans are dropped.
+        """
+        merged_start = None
+        for start, end in spans:
+            if merged_start is None:
+                merged_start = start
+            if len(text[merged_start:end].strip()) >= self.MIN_CHUNK_SIZE:
+                yield merged_start, end
+                merged_start = None
+        if merged_start is not None and text[merged_start : spans[-1][1]].strip():
+            yield merged_start, spans[-1][1]
+
+
+def _python_spans(
+    text: str, fits: Callable[[str, int, int], bool]
+) -> Optional[list[tuple[int, int]]]:
+    """Cut Python source at top-level statement groups.
+
+    Returns:
+        Contiguous (start, end) spans covering the text, or None if the
+        source does not parse (or its line numbers cannot be mapped back)
+    """
+    try:
+        # Warnings such as invalid escape sequences are the source's
+        # business, not the freeze's
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+
+    # Line starts as ast numbers them ("\r\n", "\r" or "\n" end a line)
+    lines = _PYTHON_LINE_END.split(text)
+    line_offsets = [0] + [m.end() for m in _PYTHON_LINE_END.finditer(text)] + [len(text)]
+
+    try:
+        cuts = sorted(set(_statement_cuts(tree.body, lines, line_offsets, text, fits)))
+    except IndexError:
+        return None
+    bounds = [0] + [c for c in cuts if 0 < c < len(text)] + [len(text)]
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def _statement_cuts(
+    body: list[ast.stmt],
+    lines: list[str],
+    line_offsets: list[int],
+    text: str,
+    fits: Callable[[str, int, int], bool],
+) -> Iterator[int]:
+    """Yield offsets where a new chunk starts among a list of statements."""
+    definitions = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+    previous_was_definition = None
+
+    for node in body:
+        is_definition = isinstance(node, definitions)
+        if is_definition or previous_was_definition is not False:
+            # Definitions always start a chunk; other statements start one
+            # only after a definition, so imports/constants stay grouped
+            yield line_offsets[_first_line(node, lines) - 1]
+        previous_was_definition = is_definition
+
+        if isinstance(node, ast.ClassDef) and node.body:
+            start = line_offsets[_first_line(node, lines) - 1]
+            end = line_offsets[min(node.end_lineno, len(lines))]
+            if not fits(text, start, end):
+                yield from _statement_cuts(node.body, lines, line_offsets, text, fits)
+
+
+def _first_line(node: ast.stmt, lines: list[str]) -> int:
+    """Return the 1-based first line of a statement.
+
+    Includes its decorators and the comment lines directly above it.
+    """
+    first = node.lineno
+    for decorator in getattr(node, "decorator_list", []):
+        first = min(first, decorator.lineno)
+    while first > 1 and lines[first - 2].lstrip().startswith("#"):
+        first -= 1
+    return first
+
+
+def _brace_spans(text: str) -> list[tuple[int, int]]:
+    """Cut C-like source between top-level blocks.
+
+    A cut is made after a line that closes a block back to depth zero and
+    after blank lines at depth zero. Strings, character literals and
+    comments are skipped so braces inside them are not counted.
+
+    Returns:
+        Contiguous (start, end) spans covering the text
+    """
+    cuts = []
+    depth = 0
+    i = 0
+    n = len(text)
+    line_start = 0
+    closed_block = False
+
+    while i < n:
+        ch = text[i]
+        if ch == "\n":
+            line = text[line_start:i]
+            if depth == 0 and (closed_block or not line.strip()):
+                cuts.append(i + 1)
+            closed_block = False
+            line_start = i + 1
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth = max(depth - 1, 0)
+            if depth == 0:
+                closed_block = True
+        elif ch in "\"'`":
+            i = _skip_string(text, i, ch)
+            continue
+        elif ch == "/" and text.startswith("//", i):
+            end = text.find("\n", i)
+            i = n if end == -1 else end
+            continue
+        elif ch == "/" and text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+            continue
+        i += 1
+
+    bounds = [0] + cuts + [n]
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def _skip_string(text: str, i: int, quote: str) -> int:
+    """Return the offset just past the string literal starting at i.
+
+    Single- and double-quoted literals end at the line end if unterminated,
+    so a stray apostrophe (e.g. in a Rust lifetime) cannot swallow the file.
+    """
+    i += 1
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if ch == quote:
+            return i + 1
+        if ch == "\n" and quote != "`":
+            return i
+        i += 1
+    return n
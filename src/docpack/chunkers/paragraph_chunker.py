@@ -1,5 +1,7 @@
 """Paragraph-based chunking strategy."""
 
+from typing import Callable, Iterator, Optional
+
 from docpack.models import Chunk
 
 
@@ -10,10 +12,40 @@ class ParagraphChunker:
     - Splits on paragraph boundaries (double newlines)
     - Hard-splits very long paragraphs to stay under max size
     - Merges tiny fragments to avoid noise
+
+    Paragraphs are found with an offset scanner and chunk text is sliced
+    only when a chunk is emitted, so ``iter_chunks`` holds no more than
+    one chunk of the input at a time.
+
+    With ``max_tokens`` and ``count_tokens`` set, the maximum size is
+    measured by the embedder's tokenizer instead of in characters, so no
+    chunk is longer than the model's input and nothing is truncated.
     """
 
     MAX_CHUNK_SIZE = 1000
     MIN_CHUNK_SIZE = 50
+    SEPARATOR = "\n\n"
+    # Characters per token assumed when bounding a token-sized cut; the
+    # window grows if the text turns out to be sparser than this
+    CUT_CHARS_PER_TOKEN = 8
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        count_tokens: Optional[Callable[[str], int]] = None,
+    ):
+        """Initialize the chunker.
+
+        Args:
+            max_tokens: Maximum chunk length in tokens. None sizes chunks in
+                characters (MAX_CHUNK_SIZE).
+            count_tokens: Returns the token length of a text; required with
+                ``max_tokens`` (and picklable for the parallel pipeline)
+        """
+        if (max_tokens is None) != (count_tokens is None):
+            raise ValueError("max_tokens and count_tokens must be given together")
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens
 
     def chunk(self, text: str, file_path: str) -> list[Chunk]:
         """Split text into chunks with metadata.
@@ -25,75 +57,130 @@ class ParagraphChunker:
         Returns:
             List of Chunk objects with position information
         """
-        if not text or not text.strip():
-            return []
-
-        # Split by double newlines (paragraph boundaries)
-        raw_chunks = text.split("\n\n")
+        return list(self.iter_chunks(text, file_path))
 
-        processed: list[tuple[str, int]] = []  # (text, start_char)
-        char_offset = 0
-        buffer = ""
-        buffer_start = 0
+    def iter_chunks(self, text: str, file_path: str) -> Iterator[Chunk]:
+        """Lazily yield the chunks of a text.
 
-        for raw in raw_chunks:
-            chunk_start = char_offset
+        Args:
+            text: The text content to chunk
+            file_path: Path to the source file (for metadata)
 
-            # Handle chunks over MAX_CHUNK_SIZE: hard-split
-            if len(raw) > self.MAX_CHUNK_SIZE:
+        Yields:
+            Chunk objects with position information
+        """
+        if not text or not text.strip():
+            return
+
+        # Every piece gets an index, including whitespace-only pieces that
+        # are skipped, so indices match the original list-based chunker
+        index = 0
+        for start, end in self._pieces(text):
+            chunk_text = text[start:end]
+            if chunk_text.strip():
+                yield Chunk(
+                    text=chunk_text,
+                    file_path=file_path,
+                    chunk_index=index,
+                    start_char=start,
+                    end_char=end,
+                )
+            index += 1
+
+    def _pieces(self, text: str) -> Iterator[tuple[int, int]]:
+        """Yield (start, end) offsets of chunks before empty-chunk filtering."""
+        sep = self.SEPARATOR
+        # Merged small paragraphs are contiguous in the text (joined by the
+        # separator), so the buffer is just a span; empty when start == end
+        buffer_start = buffer_end = 0
+        start = 0
+
+        while True:
+            end = text.find(sep, start)
+            if end == -1:
+                end = len(text)
+
+            # Handle paragraphs over the maximum: hard-split
+            if self._too_long(text, start, end):
                 # Flush buffer first
-                if buffer:
-                    processed.append((buffer, buffer_start))
-                    buffer = ""
-
-                # Hard-split the long chunk
-                for i in range(0, len(raw), self.MAX_CHUNK_SIZE):
-                    sub = raw[i : i + self.MAX_CHUNK_SIZE]
-                    processed.append((sub, chunk_start + i))
-
-            # Handle chunks under MIN_CHUNK_SIZE: merge with buffer
-            elif len(raw) < self.MIN_CHUNK_SIZE:
-                if buffer:
-                    buffer += "\n\n" + raw
+                if buffer_end > buffer_start:
+                    yield buffer_start, buffer_end
+                buffer_start = buffer_end = 0
+                yield from self._split(text, start, end)
+
+            # Handle paragraphs under MIN_CHUNK_SIZE: merge with buffer
+            elif end - start < self.MIN_CHUNK_SIZE:
+                if buffer_end > buffer_start and self._too_long(text, buffer_start, end):
+                    # Token mode: merging would overflow the model input
+                    yield buffer_start, buffer_end
+                    buffer_start, buffer_end = start, end
+                elif buffer_end > buffer_start:
+                    buffer_end = end
                 else:
-                    buffer = raw
-                    buffer_start = chunk_start
+                    buffer_start, buffer_end = start, end
 
                 # Flush buffer if it's now big enough
-                if len(buffer) >= self.MIN_CHUNK_SIZE:
-                    processed.append((buffer, buffer_start))
-                    buffer = ""
+                if buffer_end - buffer_start >= self.MIN_CHUNK_SIZE:
+                    yield buffer_start, buffer_end
+                    buffer_start = buffer_end = 0
 
-            # Normal-sized chunk
+            # Normal-sized paragraph
             else:
-                # Flush buffer first
-                if buffer:
-                    processed.append((buffer, buffer_start))
-                    buffer = ""
-                processed.append((raw, chunk_start))
+                if buffer_end > buffer_start:
+                    yield buffer_start, buffer_end
+                buffer_start = buffer_end = 0
+                yield start, end
 
-            # Move offset past this chunk + the separator
-            char_offset += len(raw) + 2  # +2 for "\n\n"
+            if end == len(text):
+                break
+            start = end + len(sep)
 
         # Don't forget trailing buffer
-        if buffer:
-            processed.append((buffer, buffer_start))
-
-        # Convert to Chunk objects
-        chunks = []
-        for idx, (chunk_text, start_char) in enumerate(processed):
-            # Skip empty chunks
-            if not chunk_text.strip():
-                continue
-
-            chunks.append(
-                Chunk(
-                    text=chunk_text,
-                    file_path=file_path,
-                    chunk_index=idx,
-                    start_char=start_char,
-                    end_char=start_char + len(chunk_text),
-                )
-            )
+        if buffer_end > buffer_start:
+            yield buffer_start, buffer_end
+
+    def _too_long(self, text: str, start: int, end: int) -> bool:
+        """Check whether a paragraph must be hard-split."""
+        if self.max_tokens is None:
+            return end - start > self.MAX_CHUNK_SIZE
+        return self.count_tokens(text[start:end]) > self.max_tokens
+
+    def _split(self, text: str, start: int, end: int) -> Iterator[tuple[int, int]]:
+        """Hard-split a long paragraph into spans under the maximum size."""
+        if self.max_tokens is None:
+            for i in range(start, end, self.MAX_CHUNK_SIZE):
+                yield i, min(i + self.MAX_CHUNK_SIZE, end)
+            return
+
+        while start < end:
+            cut = self._token_cut(text, start, end)
+            yield start, cut
+            start = cut
+
+    def _token_cut(self, text: str, start: int, end: int) -> int:
+        """Find the end of the longest span from start that fits max_tokens.
+
+        The search starts from a window of about CUT_CHARS_PER_TOKEN
+        characters per token (doubled while it still fits), so each cut
+        tokenizes text near the cut rather than the rest of the paragraph.
+        Then it binary searches the end offset and backs off to the last
+        whitespace so words are not cut in half when possible.
+        """
+        lo = start + 1  # lo always fits, hi never does
+        hi = min(end, start + self.max_tokens * self.CUT_CHARS_PER_TOKEN)
+        while self.count_tokens(text[start:hi]) <= self.max_tokens:
+            if hi == end:
+                return end
+            lo, hi = hi, min(end, start + (hi - start) * 2)
+
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if self.count_tokens(text[start:mid]) <= self.max_tokens:
+                lo = mid
+            else:
+                hi = mid
 
-        return chunks
+        space = max(text.rfind(" ", start, lo), text.rfind("\n", start, lo))
+        if space > start + (lo - start) // 2:
+            return space + 1
+        return lo
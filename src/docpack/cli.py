@@ -7,10 +7,11 @@ import sys
 from datetime import datetime
 from pathlib import Path
 
-from docpack.chunkers import ParagraphChunker
-from docpack.embedders import SentenceTransformerEmbedder
+from docpack.chunkers import AutoChunker
+from docpack.embedders import CachedEmbedder, EmbeddingCache, SentenceTransformerEmbedder
 from docpack.ingesters import get_ingester
-from docpack.storage import DocPackStore
+from docpack.pipeline import FreezePipeline, ParallelFreezePipeline
+from docpack.storage import BulkWriter, DocPackStore
 
 logging.basicConfig(
     level=logging.INFO,
@@ -19,62 +20,199 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def freeze(source: str, output: str) -> None:
+def parse_size(value: str) -> int:
+    """Parse a byte size such as "512K", "10M" or "1G" (argparse type)."""
+    units = {"K": 1024, "M": 1024**2, "G": 1024**3}
+    text = value.strip().upper().removesuffix("B")
+    try:
+        if text and text[-1] in units:
+            return int(float(text[:-1]) * units[text[-1]])
+        return int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {value}")
+
+
+def freeze(
+    source: str,
+    output: str,
+    sidecar: bool = False,
+    index: str = "none",
+    ivf_lists: int | None = None,
+    workers: int = 1,
+    update: str | None = None,
+    cache: bool = True,
+    cache_size_mb: int | None = None,
+    max_file_size: int | None = None,
+    read_workers: int = 1,
+    token_chunks: bool = False,
+    compact: bool = False,
+    vector_dtype: str = "float32",
+    compress: str | None = None,
+) -> None:
     """Freeze a source into a .docpack file.
 
     Args:
-        source: Path to folder or zip file
-        output: Path for output .docpack file
+        source: Path to folder, zip or tar archive
+        output: Path for output .docpack file (ignored with ``update``)
+        sidecar: Also write a memory-mappable vector sidecar file
+        index: Approximate nearest-neighbour index to build ("none", "ivf"
+            or "binary")
+        ivf_lists: Number of IVF lists (default: sqrt of chunk count)
+        workers: Number of chunking processes (1 = sequential pipeline)
+        update: Existing .docpack to update incrementally: only new and
+            changed files are re-chunked and re-embedded
+        cache: Reuse embeddings from the shared on-disk cache
+        cache_size_mb: Maximum size of the embedding cache in MB
+        max_file_size: Files larger than this (bytes) are stored as metadata only
+        read_workers: Threads reading (and decompressing) files ahead of chunking
+        token_chunks: Size chunks by the embedding model's token limit
+            instead of in characters
+        compact: Store chunks as offsets into their file's content instead
+            of copying their text
+        vector_dtype: Embedding storage precision ("float32", "float16" or
+            "int8" with per-dimension scales)
+        compress: Store file content compressed in blocks ("zlib" or "zstd")
     """
     source_path = Path(source)
-    output_path = Path(output)
+    output_path = Path(update or output)
+    if update and not output_path.exists():
+        logger.error(f"Docpack not found: {update}")
+        sys.exit(1)
 
     # Get appropriate ingester
-    ingester = get_ingester(source_path)
+    options = {"max_file_size": max_file_size} if max_file_size is not None else {}
+    if read_workers > 1:
+        options["read_workers"] = read_workers
+    ingester = get_ingester(source_path, **options)
     if ingester is None:
         logger.error(f"Cannot process: {source}")
-        logger.error("Supported inputs: folders, .zip files")
+        logger.error("Supported inputs: folders, .zip, .tar, .tar.gz and .tar.zst files")
         sys.exit(1)
 
     # Initialize components
     logger.info(f"Loading embedding model...")
-    embedder = SentenceTransformerEmbedder()
-    chunker = ParagraphChunker()
+    embedder = model_embedder = SentenceTransformerEmbedder()
+    if cache:
+        max_bytes = EmbeddingCache.DEFAULT_MAX_BYTES
+        if cache_size_mb is not None:
+            max_bytes = cache_size_mb * 1024 * 1024
+        embedder = CachedEmbedder(model_embedder, EmbeddingCache(max_bytes=max_bytes))
     store = DocPackStore(output_path)
     store.initialize()
 
-    # Store metadata
-    store.set_metadata("source", str(source_path.absolute()))
-    store.set_metadata("source_type", ingester.source_type)
-    store.set_metadata("created_at", datetime.now().isoformat())
-    store.set_metadata("embedding_model", embedder.model_name)
-
-    logger.info(f"Freezing {source} -> {output}")
-
-    file_count = 0
-    chunk_count = 0
-
-    # Process documents
-    for doc in ingester.ingest(source_path):
-        store.store_document(doc)
-        file_count += 1
-
-        # Only chunk and embed text files
-        if doc.content:
-            chunks = chunker.chunk(doc.content, doc.metadata.path)
-
-            if chunks:
-                chunk_ids = store.store_chunks(chunks)
-                texts = [c.text for c in chunks]
-                embeddings = embedder.embed(texts)
-                store.store_embeddings(chunk_ids, embeddings)
-                chunk_count += len(chunks)
-
-        status = "binary" if doc.metadata.is_binary else f"{len(doc.chunks if doc.chunks else [])} chunks"
-        logger.info(f"  {doc.metadata.path}")
+    previous = None
+    if update:
+        model = store.get_metadata("embedding_model")
+        if model and model != embedder.model_name:
+            logger.error(f"Docpack was embedded with {model}, not {embedder.model_name}")
+            sys.exit(1)
+        previous = store.file_states()
+        # Keep the docpack's existing index and sidecar up to date
+        index = store.get_metadata("ann_index") or index
+        sidecar = sidecar or bool(store.get_metadata("vector_sidecar"))
+        token_chunks = token_chunks or store.get_metadata("chunking") == "tokens"
+        # The chunk storage mode is fixed when the docpack is created
+        compact = store.get_metadata("chunk_storage") == "offsets"
+        vector_dtype = store.get_metadata("vector_dtype") or vector_dtype
+        compress = store.get_metadata("content_compression") or compress
+        logger.info(f"Updating {output_path} from {source}")
+    else:
+        logger.info(f"Freezing {source} -> {output}")
+
+    if compress == "zstd":
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            logger.error("zstd compression requires the zstandard package")
+            logger.error("Install it with: pip install 'docpack[zstd]'")
+            sys.exit(1)
+
+    if token_chunks:
+        chunker = AutoChunker(
+            max_tokens=model_embedder.max_tokens,
+            count_tokens=model_embedder.token_counter(),
+        )
+    else:
+        chunker = AutoChunker()
+
+    if update:
+        # Files with the stored size and mtime are not read at all
+        ingester = get_ingester(source_path, **options, known_files=previous)
+
+    journal_mode = "WAL" if update else "OFF"
+    # An update rewrites the whole file to VACUUM, so only do it once
+    # enough space has been freed by replaced and removed files
+    vacuum_min_free = BulkWriter.UPDATE_VACUUM_MIN_FREE if update else 0.0
+    with store.bulk_writer(
+        journal_mode=journal_mode,
+        compact=compact,
+        compression=compress,
+        vacuum_min_free=vacuum_min_free,
+    ) as writer:
+        # Store metadata
+        writer.set_metadata("source", str(source_path.absolute()))
+        writer.set_metadata("source_type", ingester.source_type)
+        writer.set_metadata("embedding_model", embedder.model_name)
+        if token_chunks:
+            writer.set_metadata("chunking", "tokens")
+        if compact:
+            writer.set_metadata("chunk_storage", "offsets")
+        if compress:
+            writer.set_metadata("content_compression", compress)
+        if update:
+            writer.set_metadata("updated_at", datetime.now().isoformat())
+        else:
+            writer.set_metadata("created_at", datetime.now().isoformat())
+
+        if workers > 1:
+            pipeline = ParallelFreezePipeline(
+                writer, embedder, chunker, workers, previous=previous
+            )
+        else:
+            pipeline = FreezePipeline(writer, embedder, chunker, previous=previous)
+
+        # Process documents (unchanged files are not logged)
+        written = 0
+        for doc, _ in pipeline.run(ingester.ingest(source_path)):
+            if pipeline.file_count > written:
+                written = pipeline.file_count
+                logger.info(f"  {doc.metadata.path}")
+
+        if vector_dtype != "float32":
+            converted = writer.quantize_vectors(vector_dtype)
+            logger.info(f"Stored {converted} vectors as {vector_dtype}")
+
+    if isinstance(embedder, CachedEmbedder):
+        logger.info(f"Embedding cache: {embedder.hits} hits, {embedder.misses} misses")
+        embedder.cache.close()
+
+    # An update that changed nothing leaves the index and sidecar valid
+    changed = not update or pipeline.file_count > 0 or pipeline.removed_count > 0
+
+    # The sidecar goes first: the index is built from vector_matrix(),
+    # which maps the sidecar when there is one
+    if sidecar and changed:
+        sidecar_path = store.write_vector_sidecar()
+        logger.info(f"Vector sidecar -> {sidecar_path}")
+
+    if index == "ivf" and changed:
+        n_lists = store.build_ivf_index(n_lists=ivf_lists)
+        logger.info(f"IVF index: {n_lists} lists")
+    elif index == "binary" and changed:
+        n_codes = store.build_binary_index()
+        logger.info(f"Binary index: {n_codes} codes")
 
     logger.info(f"")
-    logger.info(f"Frozen {file_count} files, {chunk_count} chunks -> {output_path}")
+    if update:
+        logger.info(
+            f"Updated {pipeline.file_count} files ({pipeline.chunk_count} chunks), "
+            f"{pipeline.unchanged_count} unchanged, {pipeline.removed_count} removed "
+            f"-> {output_path}"
+        )
+    else:
+        logger.info(
+            f"Frozen {pipeline.file_count} files, {pipeline.chunk_count} chunks -> {output_path}"
+        )
 
 
 def serve(docpack: str, transport: str = "stdio") -> None:
@@ -103,7 +241,7 @@ def run(source: str, transport: str = "stdio") -> None:
     """Freeze source and immediately serve (convenience command).
 
     Args:
-        source: Path to folder or zip file
+        source: Path to folder, zip or tar archive
         transport: Transport protocol (stdio or sse)
     """
     import tempfile
@@ -148,22 +286,35 @@ def deck(windowed: bool = False) -> None:
     flight_deck_main()
 
 
-def info(docpack: str) -> None:
+def info(docpack: str, benchmark: bool = False) -> None:
     """Show information about a docpack.
 
     Args:
         docpack: Path to .docpack file
+        benchmark: Also time whole-file reads of a sample of files
     """
     docpack_path = Path(docpack)
     if not docpack_path.exists():
         logger.error(f"Docpack not found: {docpack}")
         sys.exit(1)
 
-    store = DocPackStore(docpack_path)
+    store = DocPackStore(docpack_path, read_only=True)
 
     # Get metadata
     metadata = {}
-    for key in ["source", "source_type", "created_at", "embedding_model"]:
+    for key in [
+        "source",
+        "source_type",
+        "created_at",
+        "updated_at",
+        "embedding_model",
+        "chunking",
+        "chunk_storage",
+        "content_compression",
+        "vector_dtype",
+        "vector_sidecar",
+        "ann_index",
+    ]:
         value = store.get_metadata(key)
         if value:
             metadata[key] = value
@@ -185,6 +336,88 @@ def info(docpack: str) -> None:
     print(f"  Binary files: {len(binary_files)}")
     print(f"  Total: {len(files)}")
 
+    stats = store.content_stats()
+    print(f"")
+    print(f"Content:")
+    print(f"  Compression: {stats['compression'] or 'none'}")
+    if stats["stored_bytes"]:
+        ratio = stats["content_bytes"] / stats["stored_bytes"]
+        print(
+            f"  Text content: {stats['content_bytes'] / 1024:.1f} KB stored as "
+            f"{stats['stored_bytes'] / 1024:.1f} KB ({ratio:.2f}x)"
+        )
+    if benchmark:
+        from docpack.benchmark import benchmark_reads
+
+        reads = benchmark_reads(store)
+        if reads["files"]:
+            print(
+                f"  Read latency: {reads['first_ms']:.2f} ms first read, "
+                f"{reads['repeat_ms']:.2f} ms repeated ({reads['files']} files)"
+            )
+
+
+def bench(
+    docpack: str,
+    k: int = 10,
+    queries: int = 100,
+    nprobes: list[int] | None = None,
+    ivf_lists: int | None = None,
+    dtypes: bool = False,
+    binary: bool = False,
+    shortlists: list[int] | None = None,
+) -> None:
+    """Report recall@k and latency of approximate vs exact recall.
+
+    Args:
+        docpack: Path to .docpack file
+        k: Number of results per query
+        queries: Number of sampled queries
+        nprobes: IVF nprobe values to compare
+        ivf_lists: Rebuild the docpack's IVF index with this many lists first
+        dtypes: Also compare vector storage dtypes (size, latency, recall@k)
+        binary: Rebuild the docpack's index as a binary index first
+        shortlists: Binary index shortlist sizes to compare
+    """
+    from docpack.benchmark import (
+        benchmark_dtypes,
+        benchmark_recall,
+        format_dtype_report,
+        format_report,
+    )
+
+    docpack_path = Path(docpack)
+    if not docpack_path.exists():
+        logger.error(f"Docpack not found: {docpack}")
+        sys.exit(1)
+
+    store = DocPackStore(docpack_path)
+    if ivf_lists is not None:
+        logger.info(f"Rebuilding IVF index with {ivf_lists} lists...")
+        store.build_ivf_index(n_lists=ivf_lists)
+    elif binary:
+        logger.info("Rebuilding binary index...")
+        store.build_binary_index()
+
+    options = {"k": k, "queries": queries}
+    if nprobes:
+        options["nprobes"] = nprobes
+    if shortlists:
+        options["shortlists"] = shortlists
+    rows = benchmark_recall(store, **options)
+    if not rows:
+        logger.error("Docpack has no vectors")
+        sys.exit(1)
+
+    print(format_report(rows, k))
+    if len(rows) == 1:
+        print("")
+        print("No index (freeze with --index ivf/binary, or pass --ivf-lists/--binary)")
+
+    if dtypes:
+        print("")
+        print(format_dtype_report(benchmark_dtypes(store, k=k, queries=queries), k))
+
 
 def main() -> None:
     """Main CLI entry point."""
@@ -197,15 +430,87 @@ def main() -> None:
     # freeze command
     freeze_parser = subparsers.add_parser(
         "freeze",
-        help="Freeze a folder or zip into a .docpack file",
+        help="Freeze a folder or archive into a .docpack file",
     )
-    freeze_parser.add_argument("source", help="Input folder or zip file path")
+    freeze_parser.add_argument("source", help="Input folder, zip or tar archive path")
     freeze_parser.add_argument(
         "-o",
         "--output",
         default="output.docpack",
         help="Output .docpack path (default: output.docpack)",
     )
+    freeze_parser.add_argument(
+        "--sidecar",
+        action="store_true",
+        help="Write a memory-mappable vector sidecar next to the docpack",
+    )
+    freeze_parser.add_argument(
+        "--index",
+        choices=["none", "ivf", "binary"],
+        default="none",
+        help="Approximate nearest-neighbour index for recall (default: none)",
+    )
+    freeze_parser.add_argument(
+        "--ivf-lists",
+        type=int,
+        help="Number of IVF lists (default: sqrt of chunk count)",
+    )
+    freeze_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Parallel pipeline with N chunking processes (default: 1)",
+    )
+    freeze_parser.add_argument(
+        "--update",
+        metavar="DOCPACK",
+        help="Incrementally update an existing docpack instead of writing -o",
+    )
+    freeze_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not use the shared embedding cache (~/.doctown/cache)",
+    )
+    freeze_parser.add_argument(
+        "--cache-size",
+        type=int,
+        metavar="MB",
+        help="Maximum embedding cache size in MB (default: 1024)",
+    )
+    freeze_parser.add_argument(
+        "--max-file-size",
+        type=parse_size,
+        metavar="SIZE",
+        help="Store larger files as metadata only, e.g. 10M (default: no limit)",
+    )
+    freeze_parser.add_argument(
+        "--token-chunks",
+        action="store_true",
+        help="Size chunks by the embedding model's token limit, not characters",
+    )
+    freeze_parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Store chunks as offsets into file content instead of copying text",
+    )
+    freeze_parser.add_argument(
+        "--vector-dtype",
+        choices=["float32", "float16", "int8"],
+        default="float32",
+        help="Embedding storage precision (default: float32)",
+    )
+    freeze_parser.add_argument(
+        "--compress",
+        choices=["zlib", "zstd"],
+        default=None,
+        help="Store file content compressed in 64K-character blocks (zstd needs docpack[zstd])",
+    )
+    freeze_parser.add_argument(
+        "--read-workers",
+        type=int,
+        default=1,
+        help="Threads reading and decompressing files ahead of chunking (default: 1)",
+    )
 
     # serve command
     serve_parser = subparsers.add_parser(
@@ -225,7 +530,7 @@ def main() -> None:
         "run",
         help="Freeze and serve in one step",
     )
-    run_parser.add_argument("source", help="Input folder or zip file path")
+    run_parser.add_argument("source", help="Input folder, zip or tar archive path")
     run_parser.add_argument(
         "--transport",
         choices=["stdio", "sse"],
@@ -251,11 +556,78 @@ def main() -> None:
         help="Show information about a docpack",
     )
     info_parser.add_argument("docpack", help="Path to .docpack file")
+    info_parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="Also measure read latency (reads a sample of files twice)",
+    )
+
+    # bench command
+    bench_parser = subparsers.add_parser(
+        "bench",
+        help="Compare approximate and exact recall (recall@k, latency)",
+    )
+    bench_parser.add_argument("docpack", help="Path to .docpack file")
+    bench_parser.add_argument(
+        "-k",
+        type=int,
+        default=10,
+        help="Results per query (default: 10)",
+    )
+    bench_parser.add_argument(
+        "--queries",
+        type=int,
+        default=100,
+        help="Number of sampled queries (default: 100)",
+    )
+    bench_parser.add_argument(
+        "--nprobe",
+        type=int,
+        nargs="+",
+        help="IVF nprobe values to compare (default: 1 2 4 8 16 32)",
+    )
+    bench_parser.add_argument(
+        "--ivf-lists",
+        type=int,
+        help="Rebuild the IVF index with this many lists before benchmarking",
+    )
+    bench_parser.add_argument(
+        "--binary",
+        action="store_true",
+        help="Rebuild the index as a binary (sign-bit) index before benchmarking",
+    )
+    bench_parser.add_argument(
+        "--shortlist",
+        type=int,
+        nargs="+",
+        help="Binary index shortlist sizes to compare (default: 64 128 256 512 1024)",
+    )
+    bench_parser.add_argument(
+        "--dtypes",
+        action="store_true",
+        help="Also compare float32/float16/int8 vector storage (size, latency, recall)",
+    )
 
     args = parser.parse_args()
 
     if args.command == "freeze":
-        freeze(args.source, args.output)
+        freeze(
+            args.source,
+            args.output,
+            sidecar=args.sidecar,
+            index=args.index,
+            ivf_lists=args.ivf_lists,
+            workers=args.workers,
+            update=args.update,
+            cache=not args.no_cache,
+            cache_size_mb=args.cache_size,
+            max_file_size=args.max_file_size,
+            read_workers=args.read_workers,
+            token_chunks=args.token_chunks,
+            compact=args.compact,
+            vector_dtype=args.vector_dtype,
+            compress=args.compress,
+        )
     elif args.command == "serve":
         serve(args.docpack, args.transport)
     elif args.command == "run":
@@ -263,7 +635,18 @@ def main() -> None:
     elif args.command == "deck":
         deck(windowed=args.windowed)
     elif args.command == "info":
-        info(args.docpack)
+        info(args.docpack, benchmark=args.benchmark)
+    elif args.command == "bench":
+        bench(
+            args.docpack,
+            args.k,
+            args.queries,
+            args.nprobe,
+            args.ivf_lists,
+            args.dtypes,
+            args.binary,
+            args.shortlist,
+        )
 
 
 if __name__ == "__main__":
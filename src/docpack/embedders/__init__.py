@@ -1,5 +1,11 @@
 """Embedding providers for vector generation."""
 
+from docpack.embedders.cache import CachedEmbedder, EmbeddingCache, MemoryCachedEmbedder
 from docpack.embedders.sentence_transformer import SentenceTransformerEmbedder
 
-__all__ = ["SentenceTransformerEmbedder"]
+__all__ = [
+    "SentenceTransformerEmbedder",
+    "CachedEmbedder",
+    "EmbeddingCache",
+    "MemoryCachedEmbedder",
+]
@@ -0,0 +1,265 @@
+"""Embedding caches: content-addressed on disk, and in memory for queries."""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+from docpack.protocols import EmbeddingProvider
+from docpack.utils import content_hash
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    embedding BLOB NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (model, text_hash)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used);
+"""
+
+
+class EmbeddingCache:
+    """SQLite-backed embedding cache keyed by (model name, text hash).
+
+    Shared across freezes, so identical chunks in vendored copies, other
+    branches or successive snapshots are only embedded once. The cache is
+    bounded by ``max_bytes`` of stored embeddings; the least recently used
+    entries are evicted first.
+    """
+
+    DEFAULT_PATH = Path.home() / ".doctown" / "cache" / "embeddings.sqlite"
+    DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+    def __init__(self, path: Path | str | None = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """Open (or create) the cache.
+
+        Args:
+            path: Cache file. Defaults to ~/.doctown/cache/embeddings.sqlite.
+            max_bytes: Maximum total size of stored embeddings
+        """
+        self.path = Path(path) if path else self.DEFAULT_PATH
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(CACHE_SCHEMA)
+        row = self.conn.execute("SELECT COALESCE(SUM(LENGTH(embedding)), 0) FROM embeddings")
+        self._total_bytes = row.fetchone()[0]
+
+    def get_many(self, model: str, text_hashes: list[str]) -> dict[str, np.ndarray]:
+        """Look up embeddings, marking the hits as recently used."""
+        found = {
+            text_hash: np.frombuffer(blob, dtype=np.float32)
+            for text_hash, blob in self._select(model, text_hashes, "embedding")
+        }
+
+        if found:
+            now = time.time()
+            self.conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                ((now, model, text_hash) for text_hash in found),
+            )
+            self.conn.commit()
+        return found
+
+    def put_many(self, model: str, items: dict[str, np.ndarray]) -> None:
+        """Store embeddings, evicting old entries if the cache is full."""
+        if not items:
+            return
+        now = time.time()
+        rows = [
+            (model, text_hash, np.asarray(emb, dtype=np.float32).tobytes(), now)
+            for text_hash, emb in items.items()
+        ]
+        # Replaced entries (e.g. stored by a concurrent freeze) already count
+        replaced = sum(size for _, size in self._select(model, list(items), "LENGTH(embedding)"))
+        self.conn.executemany(
+            """INSERT OR REPLACE INTO embeddings (model, text_hash, embedding, last_used)
+               VALUES (?, ?, ?, ?)""",
+            rows,
+        )
+        self._total_bytes += sum(len(row[2]) for row in rows) - replaced
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+        self.conn.commit()
+
+    def close(self) -> None:
+        """Close the cache file."""
+        self.conn.close()
+
+    def _select(self, model: str, text_hashes: list[str], column: str) -> Iterator[tuple]:
+        """Yield (text_hash, column) of the stored entries among text_hashes."""
+        # Stay under SQLite's default limit on bound parameters
+        for start in range(0, len(text_hashes), 500):
+            batch = text_hashes[start : start + 500]
+            placeholders = ",".join("?" * len(batch))
+            yield from self.conn.execute(
+                f"""SELECT text_hash, {column} FROM embeddings
+                    WHERE model = ? AND text_hash IN ({placeholders})""",
+                [model, *batch],
+            )
+
+    def _evict(self) -> None:
+        """Drop least recently used entries down to 90% of max_bytes."""
+        target = int(self.max_bytes * 0.9)
+        while self._total_bytes > target:
+            victims = self.conn.execute(
+                """SELECT model, text_hash, LENGTH(embedding) FROM embeddings
+                   ORDER BY last_used LIMIT 1000"""
+            ).fetchall()
+            if not victims:
+                self._total_bytes = 0
+                break
+            removed = []
+            for model, text_hash, size in victims:
+                removed.append((model, text_hash))
+                self._total_bytes -= size
+                if self._total_bytes <= target:
+                    break
+            self.conn.executemany(
+                "DELETE FROM embeddings WHERE model = ? AND text_hash = ?", removed
+            )
+
+
+class CachedEmbedder:
+    """Embedding provider that consults an EmbeddingCache before the model.
+
+    Wraps any EmbeddingProvider. Identical texts within a call are embedded
+    once (license headers, boilerplate), and texts seen in earlier calls or
+    earlier freezes come from the cache. ``hits`` and ``misses`` count
+    texts served from the cache versus sent to the model.
+    """
+
+    def __init__(self, embedder: EmbeddingProvider, cache: EmbeddingCache):
+        """Initialize the wrapper.
+
+        Args:
+            embedder: Provider used for cache misses
+            cache: Embedding cache
+        """
+        self.embedder = embedder
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def dimension(self) -> int:
+        """Return the embedding dimension."""
+        return self.embedder.dimension
+
+    @property
+    def model_name(self) -> str:
+        """Return identifier for the model used."""
+        return self.embedder.model_name
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Generate embeddings, reusing cached vectors where possible.
+
+        Args:
+            texts: List of text strings to embed
+
+        Returns:
+            numpy array of shape (len(texts), embedding_dim)
+        """
+        if not texts:
+            return np.array([])
+
+        hashes = [content_hash(text) for text in texts]
+        unique: dict[str, str] = dict(zip(hashes, texts))
+        found = self.cache.get_many(self.model_name, list(unique))
+
+        missing = [text_hash for text_hash in unique if text_hash not in found]
+        if missing:
+            embeddings = self.embedder.embed([unique[h] for h in missing])
+            computed = dict(zip(missing, embeddings))
+            self.cache.put_many(self.model_name, computed)
+            found.update(computed)
+
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        return np.stack([found[text_hash] for text_hash in hashes]).astype(np.float32)
+
+
+class MemoryCachedEmbedder:
+    """Embedding provider with an in-memory LRU cache keyed by text.
+
+    Used by the MCP server for query strings: agents repeat and retry the
+    same queries, and a hit skips the model entirely. Thread-safe; the
+    model is called outside the lock. ``hits`` and ``misses`` count texts
+    served from the cache versus sent to the model.
+    """
+
+    DEFAULT_MAX_ENTRIES = 1024
+
+    def __init__(self, embedder: EmbeddingProvider, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """Initialize the wrapper.
+
+        Args:
+            embedder: Provider used for cache misses
+            max_entries: Most texts to keep embeddings for
+        """
+        self.embedder = embedder
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def dimension(self) -> int:
+        """Return the embedding dimension."""
+        return self.embedder.dimension
+
+    @property
+    def model_name(self) -> str:
+        """Return identifier for the model used."""
+        return self.embedder.model_name
+
+    def __len__(self) -> int:
+        """Return the number of cached embeddings."""
+        return len(self._entries)
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Generate embeddings, reusing cached vectors where possible.
+
+        Args:
+            texts: List of text strings to embed
+
+        Returns:
+            numpy array of shape (len(texts), embedding_dim)
+        """
+        if not texts:
+            return np.array([])
+
+        found: dict[str, np.ndarray] = {}
+        with self._lock:
+            for text in texts:
+                if text in self._entries:
+                    self._entries.move_to_end(text)
+                    found[text] = self._entries[text]
+
+        missing = list(dict.fromkeys(text for text in texts if text not in found))
+        if missing:
+            embeddings = np.asarray(self.embedder.embed(missing), dtype=np.float32)
+            with self._lock:
+                for text, embedding in zip(missing, embeddings):
+                    embedding = embedding.copy()
+                    embedding.flags.writeable = False
+                    found[text] = self._entries[text] = embedding
+                    self._entries.move_to_end(text)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        return np.stack([found[text] for text in texts]).astype(np.float32)
@@ -1,9 +1,26 @@
 """SentenceTransformer-based embedding provider."""
 
+import threading
+
 import numpy as np
 from sentence_transformers import SentenceTransformer
 
 
+class TokenCounter:
+    """Counts the tokens a text becomes, excluding special tokens.
+
+    Holds only the tokenizer, so it pickles cheaply to chunking worker
+    processes (fast tokenizers are picklable).
+    """
+
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+
+    def __call__(self, text: str) -> int:
+        ids = self.tokenizer(text, add_special_tokens=False, verbose=False)["input_ids"]
+        return len(ids)
+
+
 class SentenceTransformerEmbedder:
     """Embedding provider using sentence-transformers library.
 
@@ -22,14 +39,33 @@ class SentenceTransformerEmbedder:
         """
         self._model_name = model_name or self.DEFAULT_MODEL
         self._model: SentenceTransformer | None = None
+        self._load_lock = threading.Lock()
 
     @property
     def model(self) -> SentenceTransformer:
-        """Lazy-load the model on first access."""
+        """Lazy-load the model on first access.
+
+        Thread-safe: callers arriving during a load wait for it instead of
+        loading a second copy.
+        """
         if self._model is None:
-            self._model = SentenceTransformer(self._model_name)
+            with self._load_lock:
+                if self._model is None:
+                    self._model = SentenceTransformer(self._model_name)
         return self._model
 
+    @property
+    def is_ready(self) -> bool:
+        """Return whether the model is loaded."""
+        return self._model is not None
+
+    def warm_up(self) -> None:
+        """Load the model and run one encode, so the first real call is fast.
+
+        Meant to run on a background thread while a server starts.
+        """
+        self.embed(["warm up"])
+
     @property
     def dimension(self) -> int:
         """Return the embedding dimension."""
@@ -40,6 +76,16 @@ class SentenceTransformerEmbedder:
         """Return identifier for the model used."""
         return self._model_name
 
+    @property
+    def max_tokens(self) -> int:
+        """Return the longest text (in tokens) the model embeds untruncated."""
+        special = len(self.model.tokenizer("", verbose=False)["input_ids"])
+        return self.model.max_seq_length - special
+
+    def token_counter(self) -> TokenCounter:
+        """Return a picklable function counting the tokens of a text."""
+        return TokenCounter(self.model.tokenizer)
+
     def embed(self, texts: list[str]) -> np.ndarray:
         """Generate embeddings for a batch of texts.
 
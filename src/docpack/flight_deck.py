@@ -26,10 +26,10 @@ from textual.widgets import (
     Static,
 )
 
-from docpack.chunkers import ParagraphChunker
+from docpack.chunkers import AutoChunker
 from docpack.embedders import SentenceTransformerEmbedder
-from docpack.ingesters import get_ingester
-from docpack.models import Document
+from docpack.ingesters import count_documents, get_ingester
+from docpack.pipeline import FreezePipeline
 from docpack.storage import DocPackStore
 
 
@@ -459,7 +459,7 @@ class FlightDeck(App):
         self.post_message(self.LogMessage("Loading embedding model..."))
         try:
             embedder = SentenceTransformerEmbedder()
-            chunker = ParagraphChunker()
+            chunker = AutoChunker()
         except Exception as e:
             stats.status = "error"
             self.post_message(self.StatsUpdated(stats.copy()))
@@ -475,59 +475,51 @@ class FlightDeck(App):
         # Initialize store
         store = DocPackStore(output_path)
         store.initialize()
-        store.set_metadata("source", str(source_path.absolute()))
-        store.set_metadata("source_type", ingester.source_type)
-        store.set_metadata("created_at", datetime.now().isoformat())
-        store.set_metadata("embedding_model", embedder.model_name)
 
         stats.status = "running"
         self.post_message(self.StatsUpdated(stats.copy()))
         self.post_message(self.LogMessage("[green]Pipeline running...[/]"))
 
-        # First pass - count files
+        # Count files without reading them, then stream documents through
         self.post_message(self.LogMessage("Scanning source..."))
-        docs_list: list[Document] = []
-        for doc in ingester.ingest(source_path):
-            docs_list.append(doc)
-            stats.files_discovered += 1
-            if stats.files_discovered % 50 == 0:
-                self.post_message(self.StatsUpdated(stats.copy()))
-
-        self.post_message(self.StatsUpdated(stats.copy()))
-        self.post_message(self.LogMessage(f"Found {stats.files_discovered} files"))
+        total = count_documents(ingester, source_path)
+        if total is not None:
+            stats.files_discovered = total
+            self.post_message(self.StatsUpdated(stats.copy()))
+            self.post_message(self.LogMessage(f"Found {total} files"))
 
         # Process files
-        for doc in docs_list:
-            stats.current_file = doc.metadata.path
-            stats.total_bytes += doc.metadata.size_bytes
-
-            store.store_document(doc)
-            chunks_count = 0
-
-            if doc.content:
-                chunks = chunker.chunk(doc.content, doc.metadata.path)
-                if chunks:
-                    chunk_ids = store.store_chunks(chunks)
-                    texts = [c.text for c in chunks]
-                    embeddings = embedder.embed(texts)
-                    store.store_embeddings(chunk_ids, embeddings)
-                    chunks_count = len(chunks)
-                    stats.chunks_created += chunks_count
-                    stats.embeddings_generated += chunks_count
-                stats.text_files += 1
-            else:
-                stats.binary_files += 1
-
-            stats.files_processed += 1
-            self.post_message(self.StatsUpdated(stats.copy()))
-            self.post_message(
-                self.FileProcessed(
-                    doc.metadata.path,
-                    doc.metadata.is_binary,
-                    chunks_count,
-                    doc.metadata.size_bytes,
+        with store.bulk_writer() as writer:
+            writer.set_metadata("source", str(source_path.absolute()))
+            writer.set_metadata("source_type", ingester.source_type)
+            writer.set_metadata("created_at", datetime.now().isoformat())
+            writer.set_metadata("embedding_model", embedder.model_name)
+
+            pipeline = FreezePipeline(writer, embedder, chunker)
+            for doc, chunks_count in pipeline.run(ingester.ingest(source_path)):
+                if total is None:
+                    stats.files_discovered += 1
+                stats.current_file = doc.metadata.path
+                stats.total_bytes += doc.metadata.size_bytes
+                stats.chunks_created += chunks_count
+                stats.embeddings_generated = pipeline.embedded_count
+                if doc.content:
+                    stats.text_files += 1
+                else:
+                    stats.binary_files += 1
+
+                stats.files_processed += 1
+                self.post_message(self.StatsUpdated(stats.copy()))
+                self.post_message(
+                    self.FileProcessed(
+                        doc.metadata.path,
+                        doc.metadata.is_binary,
+                        chunks_count,
+                        doc.metadata.size_bytes,
+                    )
                 )
-            )
+
+            stats.embeddings_generated = pipeline.embedded_count
 
         # Complete
         stats.status = "complete"
@@ -0,0 +1,7 @@
+"""Vector search for recall: approximate indexes and reduced-precision storage."""
+
+from docpack.index.binary import BinaryIndex
+from docpack.index.ivf import IVFIndex
+from docpack.index.quantize import VECTOR_DTYPES, dequantize, quantize, score
+
+__all__ = ["IVFIndex", "BinaryIndex", "VECTOR_DTYPES", "quantize", "dequantize", "score"]
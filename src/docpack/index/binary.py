@@ -0,0 +1,120 @@
+"""Sign-bit binary index: Hamming prefilter with full-precision re-ranking."""
+
+from typing import Optional
+
+import numpy as np
+
+from docpack.index.quantize import score
+
+# Rows compared per block, bounds the temporary XOR matrix
+_BLOCK_ROWS = 65536
+
+# Set bits per byte, for NumPy versions without np.bitwise_count
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class BinaryIndex:
+    """1-bit codes of every embedding, used to shortlist recall candidates.
+
+    Each embedding is reduced to the signs of its dimensions, packed eight
+    per byte (48 bytes for 384 dimensions, 1/32 of float32). A query first
+    ranks all codes by Hamming distance to its own code, which reads a
+    fraction of the memory of a float scan, and then re-scores only the
+    shortlist against the full-precision vectors.
+    """
+
+    DEFAULT_SHORTLIST = 256
+
+    def __init__(self, codes: np.ndarray):
+        """Initialize the index.
+
+        Args:
+            codes: uint8 array of shape (n, code_bytes) from ``encode``
+        """
+        self.codes = np.ascontiguousarray(codes, dtype=np.uint8)
+        # Compare whole 64-bit words when the code width allows it
+        if self.codes.shape[1] % 8 == 0:
+            self._words = self.codes.view(np.uint64)
+        else:
+            self._words = self.codes
+
+    @classmethod
+    def build(cls, matrix: np.ndarray) -> "BinaryIndex":
+        """Encode every row of a matrix (any storage dtype)."""
+        codes = np.empty((len(matrix), cls.code_bytes(matrix.shape[1])), dtype=np.uint8)
+        for start in range(0, len(matrix), _BLOCK_ROWS):
+            block = matrix[start : start + _BLOCK_ROWS]
+            codes[start : start + len(block)] = cls.encode(block)
+        return cls(codes)
+
+    @staticmethod
+    def code_bytes(dim: int) -> int:
+        """Return the code width for a dimension, padded to 64-bit words."""
+        return -(-dim // 64) * 8
+
+    @classmethod
+    def encode(cls, vectors: np.ndarray) -> np.ndarray:
+        """Pack the sign bits of vectors into zero-padded byte codes.
+
+        Int8 scales are positive, so signs survive quantization and stored
+        vectors of any dtype can be encoded directly.
+        """
+        vectors = np.atleast_2d(vectors)
+        bits = np.packbits(vectors > 0, axis=1)
+        padded = np.zeros((len(vectors), cls.code_bytes(vectors.shape[1])), dtype=np.uint8)
+        padded[:, : bits.shape[1]] = bits
+        return padded
+
+    def search(
+        self,
+        matrix: np.ndarray,
+        query: np.ndarray,
+        limit: int,
+        shortlist: Optional[int] = None,
+        scales: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Shortlist by Hamming distance, then re-rank at full precision.
+
+        Args:
+            matrix: The indexed matrix (same row order as at build time)
+            query: Normalized query embedding
+            limit: Maximum number of rows to return
+            shortlist: Candidates to re-rank (default: DEFAULT_SHORTLIST,
+                and at least 4 x limit)
+            scales: Per-dimension scales of an int8 matrix
+
+        Returns:
+            Tuple of (rows, scores), best first
+        """
+        n = len(self.codes)
+        if n == 0 or limit <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        shortlist = min(max(shortlist or self.DEFAULT_SHORTLIST, limit * 4), n)
+        distances = self.hamming(self.encode(query)[0])
+        rows = np.argpartition(distances, shortlist - 1)[:shortlist]
+        rows.sort()  # sequential access into (possibly memory-mapped) matrix
+
+        scores = score(matrix[rows], query, scales)
+        k = min(limit, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return rows[top], scores[top]
+
+    def hamming(self, code: np.ndarray) -> np.ndarray:
+        """Return the Hamming distance from a code to every indexed code."""
+        word = code.view(self._words.dtype)
+        distances = np.empty(len(self._words), dtype=np.uint16)
+        for start in range(0, len(self._words), _BLOCK_ROWS):
+            block = self._words[start : start + _BLOCK_ROWS]
+            distances[start : start + len(block)] = _popcount(block ^ word).sum(
+                axis=1, dtype=np.uint16
+            )
+        return distances
+
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    """Count the set bits of every element."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words)
+    return _POPCOUNT[words.view(np.uint8)].reshape(len(words), -1)
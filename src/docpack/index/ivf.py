@@ -0,0 +1,136 @@
+"""IVF-flat approximate nearest-neighbour index in pure NumPy."""
+
+from typing import Optional
+
+import numpy as np
+
+from docpack.index.quantize import score
+
+# Rows scored per block, bounds the temporary (rows x lists) score matrix
+_BLOCK_ROWS = 16384
+
+
+class IVFIndex:
+    """Inverted-file index over normalized embeddings.
+
+    Vectors are clustered with spherical k-means; each vector is stored in
+    the inverted list of its nearest centroid. A query only scores the
+    vectors of the ``nprobe`` lists whose centroids are closest to it.
+    """
+
+    DEFAULT_NPROBE = 8
+    TRAIN_POINTS_PER_LIST = 256
+
+    def __init__(self, centroids: np.ndarray, assignments: np.ndarray):
+        """Initialize the index.
+
+        Args:
+            centroids: float32 array of shape (n_lists, dim)
+            assignments: List id for each row of the indexed matrix
+        """
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.assignments = np.asarray(assignments, dtype=np.int32)
+
+        # Rows grouped by list: rows of list i are order[offsets[i]:offsets[i + 1]]
+        self._order = np.argsort(self.assignments, kind="stable")
+        self._offsets = np.searchsorted(
+            self.assignments[self._order], np.arange(len(self.centroids) + 1)
+        )
+
+    @property
+    def n_lists(self) -> int:
+        """Return the number of inverted lists."""
+        return len(self.centroids)
+
+    @classmethod
+    def build(
+        cls,
+        matrix: np.ndarray,
+        n_lists: int | None = None,
+        iterations: int = 10,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        """Cluster a matrix of normalized embeddings into inverted lists.
+
+        Args:
+            matrix: float32 array of shape (n, dim)
+            n_lists: Number of lists. Defaults to sqrt(n).
+            iterations: k-means iterations
+            seed: Random seed, so freezes are reproducible
+
+        Returns:
+            An IVFIndex whose assignments follow the rows of ``matrix``
+        """
+        n = len(matrix)
+        if n_lists is None:
+            n_lists = int(np.sqrt(n))
+        n_lists = max(1, min(n_lists, n))
+
+        rng = np.random.default_rng(seed)
+        train_size = min(n, n_lists * cls.TRAIN_POINTS_PER_LIST)
+        train = np.asarray(matrix[np.sort(rng.choice(n, train_size, replace=False))])
+
+        centroids = train[rng.choice(train_size, n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            labels = _nearest(train, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, train)
+            counts = np.bincount(labels, minlength=n_lists)
+
+            # Re-seed empty lists from random training points
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = train[rng.choice(train_size, int(empty.sum()))]
+
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.where(norms == 0, 1, norms)
+
+        return cls(centroids.astype(np.float32), _nearest(matrix, centroids))
+
+    def search(
+        self,
+        matrix: np.ndarray,
+        query: np.ndarray,
+        limit: int,
+        nprobe: int | None = None,
+        scales: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Find the best-scoring rows in the probed lists.
+
+        Args:
+            matrix: The indexed matrix (same row order as at build time),
+                in any storage dtype
+            query: Normalized query embedding
+            limit: Maximum number of rows to return
+            nprobe: Number of lists to scan. Defaults to DEFAULT_NPROBE.
+            scales: Per-dimension scales of an int8 matrix
+
+        Returns:
+            Tuple of (rows, scores), best first
+        """
+        nprobe = max(1, min(nprobe or self.DEFAULT_NPROBE, self.n_lists))
+        centroid_scores = self.centroids @ query
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+
+        rows = np.concatenate(
+            [self._order[self._offsets[i] : self._offsets[i + 1]] for i in probe]
+        )
+        if len(rows) == 0 or limit <= 0:
+            return rows, np.empty(0, dtype=np.float32)
+
+        rows.sort()  # sequential access into (possibly memory-mapped) matrix
+        scores = score(matrix[rows], query, scales)
+
+        k = min(limit, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return rows[top], scores[top]
+
+
+def _nearest(matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Return the index of the closest centroid for every row."""
+    labels = np.empty(len(matrix), dtype=np.int32)
+    for start in range(0, len(matrix), _BLOCK_ROWS):
+        block = np.asarray(matrix[start : start + _BLOCK_ROWS])
+        labels[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return labels
@@ -0,0 +1,92 @@
+"""Reduced-precision embedding storage and scoring."""
+
+from typing import Optional
+
+import numpy as np
+
+# Storage dtypes accepted by freeze --vector-dtype
+VECTOR_DTYPES = {
+    "float32": np.dtype("<f4"),
+    "float16": np.dtype("<f2"),
+    "int8": np.dtype("i1"),
+}
+
+# Rows widened to float32 at a time while scoring a reduced-precision
+# matrix; small enough for the block to stay in cache
+_BLOCK_ROWS = 1024
+
+INT8_MAX = 127
+
+
+def quantize(
+    matrix: np.ndarray, dtype: str, scales: Optional[np.ndarray] = None
+) -> tuple[np.ndarray, Optional[np.ndarray]]:
+    """Convert float32 embeddings to a storage dtype.
+
+    int8 uses one scale per dimension: ``x ≈ q * scales``, with the scales
+    chosen so the largest magnitude in each dimension maps to 127.
+
+    Args:
+        matrix: float32 array of shape (n, dim)
+        dtype: One of VECTOR_DTYPES
+        scales: Existing int8 scales to reuse (values beyond them are
+            clipped), e.g. when adding vectors to a quantized docpack
+
+    Returns:
+        Tuple of (stored matrix, int8 scales or None)
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if dtype == "float32":
+        return matrix, None
+    if dtype == "float16":
+        return matrix.astype(VECTOR_DTYPES["float16"]), None
+    if dtype != "int8":
+        raise ValueError(f"Unknown vector dtype: {dtype}")
+
+    if scales is None:
+        peak = np.abs(matrix).max(axis=0) if len(matrix) else np.ones(matrix.shape[1])
+        scales = np.where(peak > 0, peak / INT8_MAX, 1.0).astype(np.float32)
+    quantized = np.clip(np.rint(matrix / scales), -INT8_MAX, INT8_MAX).astype(np.int8)
+    return quantized, scales
+
+
+def dequantize(matrix: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """Convert stored embeddings back to float32."""
+    result = np.asarray(matrix, dtype=np.float32)
+    if scales is not None:
+        result = result * scales
+    return result
+
+
+def score(
+    matrix: np.ndarray, query: np.ndarray, scales: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Dot products of every row of a (possibly reduced-precision) matrix.
+
+    The int8 scales are folded into the query instead of dequantizing the
+    matrix: ``(q * s) . x`` equals ``q . (s * x)``. Reduced-precision rows
+    are widened to float32 a block at a time, so no full-size float copy
+    of the matrix is ever made.
+
+    Args:
+        matrix: Stored embeddings of shape (n, dim)
+        query: float32 query of shape (dim,)
+        scales: Per-dimension int8 scales, if the matrix is int8
+
+    Returns:
+        float32 scores of shape (n,)
+    """
+    query = np.asarray(query, dtype=np.float32)
+    if scales is not None:
+        query = query * scales
+    if matrix.dtype == np.float32:
+        return matrix @ query
+
+    scores = np.empty(len(matrix), dtype=np.float32)
+    buffer = np.empty((min(_BLOCK_ROWS, len(matrix)), matrix.shape[1]), dtype=np.float32)
+    for start in range(0, len(matrix), _BLOCK_ROWS):
+        block = matrix[start : start + _BLOCK_ROWS]
+        widened = buffer[: len(block)]
+        np.copyto(widened, block, casting="unsafe")
+        scores[start : start + len(block)] = widened @ query
+    return scores
@@ -1,24 +1,28 @@
 """Input source handlers (ingesters) for DocPack."""
 
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 from docpack.ingesters.folder_ingester import FolderIngester
+from docpack.ingesters.tar_ingester import TarIngester
 from docpack.ingesters.zip_ingester import ZipIngester
 from docpack.protocols import Ingester
 
 # Registry of available ingesters
 _INGESTERS: list[Ingester] = [
     ZipIngester(),
+    TarIngester(),
     FolderIngester(),
 ]
 
 
-def get_ingester(source: Path | str) -> Optional[Ingester]:
+def get_ingester(source: Path | str, **options: Any) -> Optional[Ingester]:
     """Find an ingester that can handle the given source.
 
     Args:
-        source: Path to the input source (folder or zip file)
+        source: Path to the input source (folder, zip or tar archive)
+        **options: Ingester settings (e.g. max_file_size). When given, a new
+            instance of the matching ingester is built with them.
 
     Returns:
         An Ingester instance that can handle the source, or None
@@ -26,10 +30,25 @@ def get_ingester(source: Path | str) -> Optional[Ingester]:
     source_path = Path(source)
     for ingester in _INGESTERS:
         if ingester.can_handle(source_path):
-            return ingester
+            return type(ingester)(**options) if options else ingester
     return None
 
 
+def count_documents(ingester: Ingester, source: Path | str) -> Optional[int]:
+    """Cheaply count the documents an ingester will yield.
+
+    Uses the ingester's optional ``count`` method (a stat-only walk or an
+    archive listing), so no file content is read.
+
+    Returns:
+        Number of documents, or None if the ingester cannot count
+    """
+    count = getattr(ingester, "count", None)
+    if count is None:
+        return None
+    return count(Path(source))
+
+
 def register_ingester(ingester: Ingester) -> None:
     """Register a custom ingester (for plugins/extensions).
 
@@ -39,4 +58,4 @@ def register_ingester(ingester: Ingester) -> None:
     _INGESTERS.append(ingester)
 
 
-__all__ = ["get_ingester", "register_ingester", "ZipIngester", "FolderIngester"]
+__all__ = ["get_ingester", "register_ingester", "count_documents", "ZipIngester", "TarIngester", "FolderIngester"]
@@ -1,11 +1,19 @@
 """Ingester for local folders."""
 
 import os
+from functools import partial
 from pathlib import Path
-from typing import Iterator
+from typing import Callable, Iterator, Optional
 
-from docpack.models import Document, FileMetadata
-from docpack.utils.binary import detect_binary
+from docpack.ingesters.ignore import IgnoreRules
+from docpack.ingesters.reader import (
+    DEFAULT_READ_AHEAD_BYTES,
+    KnownFiles,
+    expected_read_size,
+    prefetch,
+    read_document,
+)
+from docpack.models import Document
 
 
 class FolderIngester:
@@ -13,6 +21,34 @@ class FolderIngester:
 
     source_type = "folder"
 
+    def __init__(
+        self,
+        max_file_size: Optional[int] = None,
+        use_ignore_files: bool = True,
+        read_workers: int = 1,
+        read_ahead_bytes: int = DEFAULT_READ_AHEAD_BYTES,
+        known_files: Optional[KnownFiles] = None,
+    ):
+        """Initialize the ingester.
+
+        Args:
+            max_file_size: Files larger than this (in bytes) are recorded as
+                metadata only. None means no limit.
+            use_ignore_files: Honor .gitignore and .docpackignore files
+            read_workers: Threads prefetching upcoming files (1 = read
+                inline). Documents are still yielded in walk order.
+            read_ahead_bytes: Most file content to hold read but not yet
+                consumed when prefetching
+            known_files: Stored file states of the docpack being updated;
+                files with the same size and mtime are yielded as metadata
+                only, without being read
+        """
+        self.max_file_size = max_file_size
+        self.use_ignore_files = use_ignore_files
+        self.read_workers = read_workers
+        self.read_ahead_bytes = read_ahead_bytes
+        self.known_files = known_files
+
     def can_handle(self, source: Path) -> bool:
         """Check if this is an existing directory."""
         return source.is_dir()
@@ -26,68 +62,80 @@ class FolderIngester:
         Yields:
             Document objects for each file in the folder
         """
-        for root, _, files in os.walk(source):
-            for filename in files:
-                full_path = Path(root) / filename
-                rel_path = full_path.relative_to(source)
-
-                # Skip hidden files and common ignore patterns
-                if self._should_skip(rel_path):
-                    continue
+        if self.read_workers > 1:
+            yield from prefetch(self._reads(source), self.read_workers, self.read_ahead_bytes)
+            return
 
-                # Read file content
-                try:
-                    raw_content = full_path.read_bytes()
-                except (PermissionError, OSError):
-                    continue
-
-                # Check if binary
-                is_binary = detect_binary(str(rel_path), raw_content)
-
-                # Build metadata
-                metadata = FileMetadata(
-                    path=str(rel_path),
-                    size_bytes=len(raw_content),
-                    extension=full_path.suffix.lower(),
-                    is_binary=is_binary,
-                )
+        for _, read in self._reads(source):
+            doc = read()
+            if doc is not None:
+                yield doc
 
-                # Decode content if text, otherwise None
-                content = None
-                if not is_binary:
-                    content = raw_content.decode("utf-8", errors="replace")
+    def count(self, source: Path) -> int:
+        """Count the files ingest would visit, without reading them."""
+        return sum(1 for _ in self._walk(source))
 
-                yield Document(metadata=metadata, content=content)
+    def _reads(self, source: Path) -> Iterator[tuple[int, Callable[[], Optional[Document]]]]:
+        """Yield (expected bytes, read callable) for every file in the walk.
 
-    def _should_skip(self, path: Path) -> bool:
-        """Check if a file should be skipped.
-
-        Skips hidden files, common build artifacts, and version control.
+        Files are stat'ed here so the prefetcher can budget by size; the
+        callable does the actual read and returns None if it fails.
+        """
+        for full_path, rel_path in self._walk(source):
+            try:
+                stat = full_path.stat()
+            except OSError:
+                continue
+
+            path = str(rel_path)
+            size = expected_read_size(path, stat.st_size, self.max_file_size)
+            yield size, partial(self._read, full_path, path, stat)
+
+    def _read(self, full_path: Path, path: str, stat: os.stat_result) -> Optional[Document]:
+        """Read one file, returning None if it cannot be read."""
+        try:
+            return read_document(
+                path,
+                stat.st_size,
+                lambda: full_path.open("rb"),
+                mtime=stat.st_mtime,
+                max_file_size=self.max_file_size,
+                known_files=self.known_files,
+            )
+        except OSError:
+            return None
+
+    def _walk(self, source: Path) -> Iterator[tuple[Path, Path]]:
+        """Yield (full path, relative path) of every file not ignored.
+
+        Ignored directories are pruned before descending into them, and
+        each directory's .gitignore/.docpackignore applies below it. Files
+        are visited in sorted order so the output is deterministic.
         """
-        parts = path.parts
-
-        # Skip hidden files/folders
-        if any(part.startswith(".") for part in parts):
-            return True
-
-        # Skip common artifacts
-        skip_patterns = {
-            "__pycache__",
-            "node_modules",
-            ".git",
-            ".svn",
-            ".hg",
-            "venv",
-            ".venv",
-            "env",
-            ".env",
-            "dist",
-            "build",
-            ".tox",
-            ".pytest_cache",
-            ".mypy_cache",
-            ".ruff_cache",
-            "*.egg-info",
-        }
-
-        return any(part in skip_patterns for part in parts)
+        root_rules = IgnoreRules.defaults()
+        if self.use_ignore_files:
+            root_rules = root_rules.with_ignore_files(source, "")
+        rules_by_dir = {"": root_rules}
+
+        for root, dirnames, filenames in os.walk(source):
+            rel_root = Path(root).relative_to(source).as_posix()
+            rel_root = "" if rel_root == "." else rel_root
+            rules = rules_by_dir.pop(rel_root)
+            prefix = f"{rel_root}/" if rel_root else ""
+
+            kept = []
+            for name in sorted(dirnames):
+                rel_dir = prefix + name
+                if rules.ignored(rel_dir, is_dir=True):
+                    continue
+                kept.append(name)
+                if self.use_ignore_files:
+                    rules_by_dir[rel_dir] = rules.with_ignore_files(Path(root, name), rel_dir)
+                else:
+                    rules_by_dir[rel_dir] = rules
+            dirnames[:] = kept  # prune in place so os.walk never descends
+
+            for name in sorted(filenames):
+                rel_file = prefix + name
+                if not rules.ignored(rel_file, is_dir=False):
+                    yield Path(root, name), Path(rel_file)
@@ -0,0 +1,168 @@
+"""Gitignore-style ignore rules for folder ingestion."""
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+# Ignore files read from every directory of a folder source
+IGNORE_FILES = (".gitignore", ".docpackignore")
+
+# Always skipped unless re-included with "!pattern" in an ignore file:
+# hidden files/folders, version control, virtualenvs and build artifacts
+DEFAULT_PATTERNS = (
+    ".*",
+    "__pycache__",
+    "node_modules",
+    "venv",
+    "env",
+    "dist",
+    "build",
+    "*.egg-info",
+)
+
+
+@dataclass(frozen=True)
+class IgnoreRule:
+    """A compiled ignore pattern."""
+
+    regex: re.Pattern[str]
+    negate: bool  # "!pattern" re-includes matching paths
+    dir_only: bool  # "pattern/" only matches directories
+    anchored: bool  # matched against the whole path, not just the name
+    base: str  # directory of the ignore file ("" for the source root)
+
+    def matches(self, path: str, is_dir: bool) -> bool:
+        """Check a path (relative to the source root, "/"-separated)."""
+        if self.dir_only and not is_dir:
+            return False
+        if self.base:
+            if not path.startswith(self.base + "/"):
+                return False
+            path = path[len(self.base) + 1 :]
+        if not self.anchored:
+            path = path.rsplit("/", 1)[-1]
+        return self.regex.fullmatch(path) is not None
+
+
+class IgnoreRules:
+    """An ordered set of ignore rules; the last matching rule wins.
+
+    Rules are compiled once. Rules from an ignore file only apply below the
+    directory containing it, so the folder walk extends the parent's rules
+    with each directory's own ignore files.
+    """
+
+    def __init__(self, rules: Iterable[IgnoreRule] = ()):
+        self.rules = tuple(rules)
+
+    @classmethod
+    def defaults(cls) -> "IgnoreRules":
+        """Return the built-in rules (DEFAULT_PATTERNS)."""
+        return cls(filter(None, (parse_pattern(p) for p in DEFAULT_PATTERNS)))
+
+    def ignored(self, path: str, is_dir: bool) -> bool:
+        """Check if a path (relative to the source root) is ignored."""
+        for rule in reversed(self.rules):
+            if rule.matches(path, is_dir):
+                return not rule.negate
+        return False
+
+    def extend(self, rules: Iterable[IgnoreRule]) -> "IgnoreRules":
+        """Return new rules with ``rules`` taking precedence."""
+        rules = tuple(rules)
+        return IgnoreRules(self.rules + rules) if rules else self
+
+    def with_ignore_files(self, directory: Path, base: str) -> "IgnoreRules":
+        """Extend with the ignore files found in a directory.
+
+        Args:
+            directory: Directory on disk
+            base: Its path relative to the source root ("" for the root)
+        """
+        rules: list[IgnoreRule] = []
+        for name in IGNORE_FILES:
+            try:
+                text = (directory / name).read_text(encoding="utf-8", errors="replace")
+            except OSError:
+                continue
+            rules.extend(parse_ignore_file(text, base))
+        return self.extend(rules)
+
+
+def parse_ignore_file(text: str, base: str = "") -> list[IgnoreRule]:
+    """Parse the lines of a .gitignore/.docpackignore file."""
+    rules = []
+    for line in text.splitlines():
+        rule = parse_pattern(line, base)
+        if rule is not None:
+            rules.append(rule)
+    return rules
+
+
+def parse_pattern(line: str, base: str = "") -> Optional[IgnoreRule]:
+    """Compile one gitignore pattern, or None for blanks and comments."""
+    pattern = line.rstrip()
+    if not pattern or pattern.startswith("#"):
+        return None
+
+    negate = pattern.startswith("!")
+    if negate:
+        pattern = pattern[1:]
+    elif pattern.startswith("\\"):
+        pattern = pattern[1:]  # escaped leading "#" or "!"
+
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    if not pattern:
+        return None
+
+    # A slash anywhere but the end anchors the pattern to the ignore file's dir
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+
+    return IgnoreRule(
+        regex=re.compile(_translate(pattern)),
+        negate=negate,
+        dir_only=dir_only,
+        anchored=anchored,
+        base=base,
+    )
+
+
+def _translate(pattern: str) -> str:
+    """Translate a gitignore glob to a regular expression."""
+    out = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**/", i):
+                out.append("(?:.*/)?")  # zero or more directories
+                i += 3
+                continue
+            if pattern.startswith("**", i) and (i + 2 == n):
+                out.append(".*")  # everything inside
+                i += 2
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1 : end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
@@ -0,0 +1,201 @@
+"""Lazy, size-capped file reading shared by the ingesters."""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from threading import Condition, Thread
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Iterator, Mapping, Optional
+
+from docpack.models import Document, FileMetadata
+from docpack.utils.binary import SAMPLE_SIZE, is_binary_content, is_binary_extension
+
+
+DEFAULT_READ_AHEAD_BYTES = 64 * 1024 * 1024
+
+# Stored file states of a docpack being updated: path -> (size_bytes, mtime, ...)
+KnownFiles = Mapping[str, tuple]
+
+
+def expected_read_size(path: str, size_bytes: int, max_file_size: Optional[int]) -> int:
+    """Estimate how many bytes read_document will pull into memory."""
+    if is_binary_extension(path):
+        return 0
+    if max_file_size is not None and size_bytes > max_file_size:
+        return min(size_bytes, SAMPLE_SIZE)
+    return size_bytes
+
+
+def prefetch(
+    reads: Iterable[tuple[int, Callable[[], Optional[Document]]]],
+    workers: int,
+    read_ahead_bytes: int = DEFAULT_READ_AHEAD_BYTES,
+) -> Iterator[Document]:
+    """Run reads on a thread pool, yielding results in submission order.
+
+    Reads are submitted ahead of the consumer until the expected size of
+    the documents in flight reaches ``read_ahead_bytes`` (one read is
+    always allowed, however large), so slow storage overlaps with the
+    chunking and embedding downstream without unbounded buffering.
+
+    Args:
+        reads: (expected bytes, read callable) pairs; a callable returning
+            None is skipped
+        workers: Number of reader threads
+        read_ahead_bytes: Budget for documents read but not yet consumed
+
+    Yields:
+        Documents in the order of ``reads``
+    """
+    pending: deque = deque()
+    in_flight = 0
+    reads = iter(reads)
+    exhausted = False
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="docpack-read") as pool:
+        try:
+            while pending or not exhausted:
+                # Top up the window, bounded by bytes and a multiple of workers
+                while not exhausted and len(pending) < workers * 4 and (
+                    not pending or in_flight < read_ahead_bytes
+                ):
+                    item = next(reads, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    size, read = item
+                    pending.append((size, pool.submit(read)))
+                    in_flight += size
+
+                if not pending:
+                    break
+                size, future = pending.popleft()
+                in_flight -= size
+                doc = future.result()
+                if doc is not None:
+                    yield doc
+        finally:
+            # Consumer stopped early: drop reads that have not started
+            for _, future in pending:
+                future.cancel()
+
+
+def read_in_background(
+    produce: Callable[[], Iterator[Document]],
+    read_ahead_bytes: int = DEFAULT_READ_AHEAD_BYTES,
+) -> Iterator[Document]:
+    """Run a sequential reader on its own thread, ahead of the consumer.
+
+    For sources that can only be read in order (compressed streams), this
+    overlaps decompression with downstream work. The thread pauses while
+    the content of unconsumed documents exceeds ``read_ahead_bytes``.
+
+    Args:
+        produce: Returns the document iterator; it is created and fully
+            consumed on the background thread
+        read_ahead_bytes: Budget for documents read but not yet consumed
+
+    Yields:
+        Documents in the order ``produce`` yields them
+    """
+    buffer: deque = deque()
+    cond = Condition()
+    state = {"buffered": 0, "done": False, "stop": False, "error": None}
+
+    def run() -> None:
+        try:
+            for doc in produce():
+                size = len(doc.content) if doc.content else 0
+                with cond:
+                    cond.wait_for(
+                        lambda: state["stop"] or not buffer or state["buffered"] < read_ahead_bytes
+                    )
+                    if state["stop"]:
+                        return
+                    buffer.append((size, doc))
+                    state["buffered"] += size
+                    cond.notify_all()
+        except BaseException as e:
+            state["error"] = e
+        finally:
+            with cond:
+                state["done"] = True
+                cond.notify_all()
+
+    thread = Thread(target=run, name="docpack-read", daemon=True)
+    thread.start()
+    try:
+        while True:
+            with cond:
+                cond.wait_for(lambda: buffer or state["done"])
+                if not buffer:
+                    break
+                size, doc = buffer.popleft()
+                state["buffered"] -= size
+                cond.notify_all()
+            yield doc
+        if state["error"] is not None:
+            raise state["error"]
+    finally:
+        with cond:
+            state["stop"] = True
+            cond.notify_all()
+        thread.join()
+
+
+def read_document(
+    path: str,
+    size_bytes: int,
+    open_stream: Callable[[], BinaryIO],
+    mtime: Optional[float] = None,
+    max_file_size: Optional[int] = None,
+    known_files: Optional[KnownFiles] = None,
+) -> Document:
+    """Build a Document, reading only as much of the file as needed.
+
+    Files with a binary extension are not opened at all, nor are files
+    whose size and mtime match their entry in ``known_files``. Otherwise
+    the first block is read and classified; the rest of the file is read
+    only for text files within ``max_file_size``. Binary, oversized and
+    known files are returned as metadata only (content=None).
+
+    Args:
+        path: Path of the file within the source
+        size_bytes: File size from stat or the archive directory
+        open_stream: Opens the file for binary reading
+        mtime: Modification time, if known
+        max_file_size: Largest file (in bytes) whose content is kept
+        known_files: Stored file states of the docpack being updated
+
+    Raises:
+        OSError: If the file cannot be read
+    """
+    is_binary = is_binary_extension(path)
+    content = None
+
+    if not is_binary and not is_unchanged(known_files, path, size_bytes, mtime):
+        with open_stream() as f:
+            head = f.read(SAMPLE_SIZE)
+            is_binary = is_binary_content(head)
+            if not is_binary and (max_file_size is None or size_bytes <= max_file_size):
+                content = (head + f.read()).decode("utf-8", errors="replace")
+
+    metadata = FileMetadata(
+        path=path,
+        size_bytes=size_bytes,
+        extension=Path(path).suffix.lower(),
+        is_binary=is_binary,
+        mtime=mtime,
+    )
+    return Document(metadata=metadata, content=content)
+
+
+def is_unchanged(
+    known_files: Optional[KnownFiles], path: str, size_bytes: int, mtime: Optional[float]
+) -> bool:
+    """Check whether a file has the size and mtime stored for it.
+
+    Such files are skipped by an incremental update, so their content is
+    never needed.
+    """
+    state = known_files.get(path) if known_files else None
+    return state is not None and mtime is not None and state[:2] == (size_bytes, mtime)
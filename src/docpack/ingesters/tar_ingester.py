@@ -0,0 +1,147 @@
+"""Ingester for tar archives (.tar, .tar.gz, .tar.zst)."""
+
+import posixpath
+import tarfile
+from contextlib import ExitStack
+from pathlib import Path
+from typing import IO, Iterator, Optional
+
+from docpack.ingesters.reader import (
+    DEFAULT_READ_AHEAD_BYTES,
+    KnownFiles,
+    read_document,
+    read_in_background,
+)
+from docpack.models import Document
+
+# Suffix -> compression ("" = uncompressed, handled by tarfile directly)
+TAR_SUFFIXES = {
+    ".tar": "",
+    ".tar.gz": "gz",
+    ".tgz": "gz",
+    ".tar.zst": "zst",
+    ".tzst": "zst",
+}
+
+
+class TarIngester:
+    """Ingester for tar archives, optionally gzip or zstd compressed.
+
+    Archives are read as a stream in a single pass: members come out in
+    archive order and compressed tars are never seeked. Zstandard support
+    needs the optional ``zstandard`` package.
+    """
+
+    source_type = "tar"
+
+    def __init__(
+        self,
+        max_file_size: Optional[int] = None,
+        read_workers: int = 1,
+        read_ahead_bytes: int = DEFAULT_READ_AHEAD_BYTES,
+        known_files: Optional[KnownFiles] = None,
+    ):
+        """Initialize the ingester.
+
+        Args:
+            max_file_size: Members larger than this (in bytes) are recorded
+                as metadata only. None means no limit.
+            read_workers: A compressed stream can only be read in order, so
+                any value above 1 moves decompression to one background
+                thread that reads ahead of the consumer
+            read_ahead_bytes: Most content to hold read but not yet consumed
+            known_files: Stored file states of the docpack being updated;
+                files with the same size and mtime are yielded as metadata
+                only, without being read
+        """
+        self.max_file_size = max_file_size
+        self.read_workers = read_workers
+        self.read_ahead_bytes = read_ahead_bytes
+        self.known_files = known_files
+
+    def can_handle(self, source: Path) -> bool:
+        """Check if this is a tar archive."""
+        return _compression(source) is not None and source.is_file()
+
+    def ingest(self, source: Path) -> Iterator[Document]:
+        """Yield documents from a tar archive.
+
+        Args:
+            source: Path to the archive
+
+        Yields:
+            Document objects for each regular file in the archive
+        """
+        if self.read_workers > 1:
+            yield from read_in_background(lambda: self._ingest(source), self.read_ahead_bytes)
+        else:
+            yield from self._ingest(source)
+
+    def count(self, source: Path) -> Optional[int]:
+        """Count members of an uncompressed tar from its headers.
+
+        Compressed archives would have to be fully decompressed to count,
+        so None is returned for them.
+        """
+        if _compression(source) != "":
+            return None
+        with tarfile.open(source, "r:") as tf:
+            return sum(1 for member in tf if member.isfile())
+
+    def _ingest(self, source: Path) -> Iterator[Document]:
+        """Stream members in archive order."""
+        with ExitStack() as stack:
+            tf = stack.enter_context(_open_stream(source, stack))
+            for member in tf:
+                path = _member_path(member.name)
+                if not member.isfile() or path is None:
+                    continue
+                # In stream mode a member must be read before moving on;
+                # binary extensions are skipped over without being read
+                yield read_document(
+                    path,
+                    member.size,
+                    lambda: tf.extractfile(member),
+                    mtime=float(member.mtime),
+                    max_file_size=self.max_file_size,
+                    known_files=self.known_files,
+                )
+
+
+def _compression(source: Path) -> Optional[str]:
+    """Return the compression of a tar path, or None if it is not a tar."""
+    name = source.name.lower()
+    for suffix, compression in TAR_SUFFIXES.items():
+        if name.endswith(suffix):
+            return compression
+    return None
+
+
+def _member_path(name: str) -> Optional[str]:
+    """Normalize a member name to a relative POSIX path, like folder paths.
+
+    ``tar czf x.tgz .`` stores names as "./dir/file"; the prefix, leading
+    slashes and "." components are dropped. None for names that reduce to
+    nothing.
+    """
+    path = posixpath.normpath(name).lstrip("/")
+    return None if path in ("", ".") else path
+
+
+def _open_stream(source: Path, stack: ExitStack) -> tarfile.TarFile:
+    """Open a tar archive for a single forward pass."""
+    compression = _compression(source)
+    if compression != "zst":
+        return tarfile.open(source, f"r|{compression}")
+
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "Reading .tar.zst archives requires the zstandard package "
+            "(pip install 'docpack[zstd]')"
+        ) from None
+
+    raw: IO[bytes] = stack.enter_context(open(source, "rb"))
+    stream = stack.enter_context(zstandard.ZstdDecompressor().stream_reader(raw))
+    return tarfile.open(fileobj=stream, mode="r|")
@@ -12,11 +12,16 @@ class FileMetadata:
     size_bytes: int
     extension: str
     is_binary: bool
+    mtime: Optional[float] = None  # modification time (seconds since epoch)
 
 
-@dataclass
+@dataclass(slots=True)
 class Chunk:
-    """A chunk of text with its context."""
+    """A chunk of text with its context.
+
+    ``text`` is always ``content[start_char:end_char]`` of its file, which
+    lets compact docpacks store only the offsets.
+    """
 
     text: str
     file_path: str
@@ -30,5 +35,5 @@ class Document:
     """A document extracted from an input source."""
 
     metadata: FileMetadata
-    content: Optional[str] = None  # None for binary files
+    content: Optional[str] = None  # None for binary and oversized files
     chunks: list[Chunk] = field(default_factory=list)
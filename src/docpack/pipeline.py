@@ -0,0 +1,331 @@
+"""Freeze pipeline shared by the CLI and the Flight Deck."""
+
+import multiprocessing
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import batched
+from typing import Iterable, Iterator, Optional
+
+from docpack.models import Chunk, Document
+from docpack.protocols import ChunkingStrategy, EmbeddingProvider
+from docpack.storage import BulkWriter, ThreadedWriter
+from docpack.utils import content_hash
+
+# Stored state of a file: (size_bytes, mtime, content_hash)
+FileState = tuple[int, Optional[float], Optional[str]]
+
+
+class EmbeddingBatcher:
+    """Collects chunks across documents and embeds them in full batches.
+
+    Embedding one file at a time gives the model batches of 1-3 chunks, so
+    most of the time goes to per-call overhead. The batcher buffers chunk
+    texts until it has ``window`` batches' worth, sorts them by length so
+    each batch needs little padding, embeds them ``batch_size`` at a time
+    and writes the vectors back by chunk id.
+    """
+
+    def __init__(
+        self,
+        embedder: EmbeddingProvider,
+        writer: BulkWriter | ThreadedWriter,
+        batch_size: int = 256,
+        window: int = 4,
+    ):
+        """Initialize the batcher.
+
+        Args:
+            embedder: Embedding provider
+            writer: Writer that receives the vectors
+            batch_size: Number of chunks per embed call
+            window: Number of batches buffered before sorting and embedding
+        """
+        self.embedder = embedder
+        self.writer = writer
+        self.batch_size = batch_size
+        self.window = window
+        self.embedded = 0
+        self._pending: list[tuple[int, str]] = []  # (chunk_id, text)
+
+    def add(self, chunk_ids: list[int], texts: list[str]) -> int:
+        """Queue chunks for embedding, embedding a window once it is full.
+
+        Returns:
+            Number of chunks embedded by this call
+        """
+        self._pending.extend(zip(chunk_ids, texts))
+        if len(self._pending) >= self.batch_size * self.window:
+            return self.flush()
+        return 0
+
+    def flush(self) -> int:
+        """Embed every pending chunk.
+
+        Returns:
+            Number of chunks embedded
+        """
+        pending = sorted(self._pending, key=lambda item: len(item[1]))
+        self._pending = []
+
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start : start + self.batch_size]
+            embeddings = self.embedder.embed([text for _, text in batch])
+            self.writer.store_embeddings([chunk_id for chunk_id, _ in batch], embeddings)
+
+        self.embedded += len(pending)
+        return len(pending)
+
+
+class FreezePipeline:
+    """Stores, chunks and embeds documents into a docpack.
+
+    Chunks are stored as each document arrives; embedding is deferred to
+    an EmbeddingBatcher so the model sees full batches across files. Use
+    ``run``, or call ``process`` per document and ``finish`` at the end.
+
+    Given the stored file states of an existing docpack, the pipeline
+    updates it incrementally: files whose size and mtime (or content hash)
+    are unchanged are skipped, changed files are replaced, and files that
+    are no longer in the source are removed by ``finish``.
+    """
+
+    def __init__(
+        self,
+        writer: BulkWriter | ThreadedWriter,
+        embedder: EmbeddingProvider,
+        chunker: ChunkingStrategy,
+        batch_size: int = 256,
+        previous: Optional[dict[str, FileState]] = None,
+    ):
+        """Initialize the pipeline.
+
+        Args:
+            writer: Bulk writer of an initialized store
+            embedder: Embedding provider
+            chunker: Chunking strategy for text documents
+            batch_size: Number of chunks per embed call
+            previous: File states of the docpack being updated
+                (from DocPackStore.file_states), or None for a fresh build
+        """
+        self.writer = writer
+        self.chunker = chunker
+        self.batcher = EmbeddingBatcher(embedder, writer, batch_size=batch_size)
+        self.previous = dict(previous) if previous is not None else None
+        self.file_count = 0
+        self.chunk_count = 0
+        self.unchanged_count = 0
+        self.removed_count = 0
+
+    @property
+    def embedded_count(self) -> int:
+        """Return the number of chunks embedded so far."""
+        return self.batcher.embedded
+
+    def run(self, documents: Iterable[Document]) -> Iterator[tuple[Document, int]]:
+        """Process documents, yielding each with its chunk count.
+
+        Every chunk is embedded and written once the iterator is exhausted.
+        """
+        for doc in documents:
+            yield doc, self.process(doc)
+        self.finish()
+
+    def process(self, doc: Document) -> int:
+        """Store a document and queue its chunks for embedding.
+
+        Returns:
+            Number of chunks created for the document (0 if unchanged)
+        """
+        if not self._changed(doc):
+            return 0
+
+        chunks: Iterable[Chunk] = []
+        # Only chunk and embed text files; chunkers that can stream are
+        # consumed in batches so a huge file is never chunked all at once
+        if doc.content:
+            chunk = getattr(self.chunker, "iter_chunks", self.chunker.chunk)
+            chunks = chunk(doc.content, doc.metadata.path)
+        return self._store(doc, chunks)
+
+    def finish(self) -> None:
+        """Embed any chunks still waiting for a full batch.
+
+        When updating, also removes files that were not seen in the source.
+        """
+        self.batcher.flush()
+        if self.previous:
+            for path in self.previous:
+                self.writer.delete_file(path)
+            self.removed_count += len(self.previous)
+            self.previous.clear()
+
+    def _changed(self, doc: Document) -> bool:
+        """Check a document against the docpack being updated.
+
+        Unchanged files are left in place; stale rows of changed files are
+        deleted so the document can be stored again.
+        """
+        if self.previous is None:
+            return True
+
+        state = self.previous.pop(doc.metadata.path, None)
+        if state is None:
+            return True
+
+        size_bytes, mtime, stored_hash = state
+        meta = doc.metadata
+        if meta.mtime is not None and size_bytes == meta.size_bytes and mtime == meta.mtime:
+            self.unchanged_count += 1
+            return False
+
+        if doc.content is not None and stored_hash == content_hash(doc.content):
+            self.writer.touch_file(meta.path, meta.mtime)
+            self.unchanged_count += 1
+            return False
+
+        self.writer.delete_file(meta.path)
+        return True
+
+    def _store(self, doc: Document, chunks: Iterable[Chunk]) -> int:
+        """Write a chunked document and queue its chunks for embedding."""
+        digest = content_hash(doc.content) if doc.content is not None else None
+        self.writer.store_document(doc, digest)
+        self.file_count += 1
+
+        n_chunks = 0
+        for batch in batched(chunks, self.batcher.batch_size):
+            chunk_ids = self.writer.store_chunks(list(batch))
+            self.batcher.add(chunk_ids, [c.text for c in batch])
+            n_chunks += len(batch)
+        self.chunk_count += n_chunks
+
+        self.writer.file_done()
+        return n_chunks
+
+
+class ParallelFreezePipeline(FreezePipeline):
+    """Multi-stage freeze pipeline linked by bounded queues.
+
+    Stages:
+    - a reader thread drives the ingester (file reading, binary detection)
+    - a process pool chunks text documents
+    - the calling thread embeds chunks in full batches
+    - a writer thread performs all SQLite writes
+
+    Documents are yielded in ingestion order, so chunk ids are the same as
+    with the sequential pipeline. The queues keep memory flat regardless of
+    source size.
+
+    Chunking processes are spawned rather than forked: the writer thread
+    (and any SQLite or ingester locks it holds) is already running, and a
+    forked child could inherit a held lock and hang.
+    """
+
+    def __init__(
+        self,
+        writer: BulkWriter,
+        embedder: EmbeddingProvider,
+        chunker: ChunkingStrategy,
+        workers: int,
+        batch_size: int = 256,
+        previous: Optional[dict[str, FileState]] = None,
+    ):
+        """Initialize the pipeline.
+
+        Args:
+            writer: Bulk writer of an initialized store
+            embedder: Embedding provider
+            chunker: Chunking strategy (must be picklable)
+            workers: Number of chunking processes
+            batch_size: Number of chunks per embed call
+            previous: File states of the docpack being updated, if any
+        """
+        super().__init__(ThreadedWriter(writer), embedder, chunker, batch_size, previous)
+        self.workers = workers
+        self.queue_size = workers * 4
+
+    def run(self, documents: Iterable[Document]) -> Iterator[tuple[Document, int]]:
+        """Process documents, yielding each with its chunk count."""
+        stop = threading.Event()
+        try:
+            with ProcessPoolExecutor(
+                self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_chunk_worker,
+                initargs=(self.chunker,),
+            ) as pool:
+                pending: deque[tuple[Document, bool, Optional[Future]]] = deque()
+                for doc in _read_ahead(documents, self.queue_size, stop):
+                    changed = self._changed(doc)
+                    future = None
+                    if changed and doc.content:
+                        future = pool.submit(_chunk_in_worker, doc.content, doc.metadata.path)
+                    pending.append((doc, changed, future))
+
+                    if len(pending) >= self.queue_size:
+                        yield self._complete(*pending.popleft())
+
+                while pending:
+                    yield self._complete(*pending.popleft())
+
+            self.finish()
+        finally:
+            stop.set()
+            self.writer.close()
+
+    def _complete(
+        self, doc: Document, changed: bool, future: Optional[Future]
+    ) -> tuple[Document, int]:
+        """Wait for a document's chunks and hand them to the writer."""
+        if not changed:
+            return doc, 0
+        chunks = future.result() if future is not None else []
+        return doc, self._store(doc, chunks)
+
+
+# Chunker used by the worker processes of ParallelFreezePipeline
+_worker_chunker: Optional[ChunkingStrategy] = None
+
+
+def _init_chunk_worker(chunker: ChunkingStrategy) -> None:
+    global _worker_chunker
+    _worker_chunker = chunker
+
+
+def _chunk_in_worker(text: str, file_path: str) -> list[Chunk]:
+    assert _worker_chunker is not None
+    return _worker_chunker.chunk(text, file_path)
+
+
+def _read_ahead(
+    documents: Iterable[Document], maxsize: int, stop: threading.Event
+) -> Iterator[Document]:
+    """Iterate documents on a background thread, buffering up to maxsize."""
+    buffer: queue.Queue = queue.Queue(maxsize)
+    done = object()
+
+    def produce() -> None:
+        try:
+            for doc in documents:
+                while not stop.is_set():
+                    try:
+                        buffer.put(doc, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+            buffer.put(done)
+        except BaseException as e:
+            buffer.put(e)
+
+    threading.Thread(target=produce, name="docpack-reader", daemon=True).start()
+    while True:
+        item = buffer.get()
+        if item is done:
+            return
+        if isinstance(item, BaseException):
+            raise item
+        yield item
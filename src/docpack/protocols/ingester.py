@@ -12,6 +12,9 @@ class Ingester(Protocol):
 
     Implementations handle different input formats (zip, folder, PDF, URL).
     Uses structural subtyping - no inheritance required.
+
+    Ingesters may also provide ``count(source) -> int`` to report the number
+    of documents without reading them (used for progress totals).
     """
 
     @property
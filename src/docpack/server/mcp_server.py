@@ -1,14 +1,24 @@
 """FastMCP server implementation for DocPack."""
 
+import logging
+import threading
 from pathlib import Path
 
 from mcp.server.fastmcp import FastMCP
 
-from docpack.embedders import SentenceTransformerEmbedder
+from docpack.embedders import MemoryCachedEmbedder, SentenceTransformerEmbedder
 from docpack.storage import DocPackStore
 
+logger = logging.getLogger(__name__)
 
-def create_mcp_server(docpack_path: Path) -> FastMCP:
+# Characters returned by read when no range is given
+MAX_READ_CHARS = 100_000
+
+# Query embeddings kept in memory, so repeated and retried recalls skip the model
+QUERY_CACHE_SIZE = 1024
+
+
+def create_mcp_server(docpack_path: Path, warm_up: bool = True) -> FastMCP:
     """Create an MCP server for a specific docpack.
 
     Design: 1 process = 1 docpack. This prevents context pollution
@@ -16,6 +26,8 @@ def create_mcp_server(docpack_path: Path) -> FastMCP:
 
     Args:
         docpack_path: Path to the .docpack file to serve
+        warm_up: Load the embedding model and the vectors on a background
+            thread right away, instead of on the first recall
 
     Returns:
         Configured FastMCP server instance
@@ -25,66 +37,199 @@ def create_mcp_server(docpack_path: Path) -> FastMCP:
     )
 
     # Initialize store and embedder (loaded once per server)
-    store = DocPackStore(docpack_path)
-    embedder = SentenceTransformerEmbedder()
+    store = DocPackStore(docpack_path, read_only=True)
+    model = SentenceTransformerEmbedder()
+    embedder = MemoryCachedEmbedder(model, max_entries=QUERY_CACHE_SIZE)
+    warm_up_errors: list[Exception] = []
+
+    def warm() -> None:
+        try:
+            model.warm_up()
+            store.vector_matrix()
+        except Exception as e:
+            # Recall retries the load and reports the error itself
+            logger.exception("Warm-up failed")
+            warm_up_errors.append(e)
+
+    if warm_up:
+        threading.Thread(target=warm, name="docpack-warm-up", daemon=True).start()
+
+    @mcp.tool()
+    def status() -> str:
+        """Report whether the server is ready for recall queries.
+
+        The embedding model loads in the background when the server
+        starts; recall waits for it if called earlier.
+
+        Returns:
+            Model state and query cache statistics
+        """
+        if model.is_ready:
+            state = "ready"
+        elif warm_up_errors:
+            state = f"failed to load: {warm_up_errors[-1]}"
+        elif warm_up:
+            state = "loading"
+        else:
+            state = "loads on first recall"
+        return "\n".join(
+            [
+                f"Docpack: {docpack_path.name}",
+                f"Model: {model.model_name} ({state})",
+                f"Query cache: {len(embedder)}/{embedder.max_entries} queries, "
+                f"{embedder.hits} hits, {embedder.misses} misses",
+            ]
+        )
 
     @mcp.tool()
-    def ls(path: str = "") -> str:
-        """List files in the docpack.
+    def ls(
+        path: str = "", depth: int = 1, glob: str = "", limit: int = 200, cursor: str = ""
+    ) -> str:
+        """List files and directories in the docpack.
+
+        Directories are shown with a trailing "/", their file count and
+        total size, so a large tree can be explored one level at a time.
 
         Args:
-            path: Optional path prefix to filter results (e.g., "src/" to list only files in src/)
+            path: Directory to list (e.g., "src/"); empty for the root
+            depth: Levels to descend (1 = direct children, 0 = everything below)
+            glob: Only show entries whose name matches (e.g., "*.py"), or
+                whose path below the directory matches if it contains "/"
+            limit: Maximum number of entries to return (default: 200)
+            cursor: Continue a listing from the cursor shown at its end
 
         Returns:
-            Formatted list of files with size and type information
+            Formatted list of entries with size and type information
         """
-        files = store.list_files(path)
+        if limit < 1:
+            return f"Error: limit must be at least 1, got {limit}"
 
-        if not files:
+        entries, next_cursor = store.list_dir(
+            path, depth=depth, pattern=glob or None, limit=limit, cursor=cursor or None
+        )
+
+        if not entries:
             return f"No files found matching '{path}'"
 
         lines = []
-        for f in files:
-            size = f["size_bytes"]
-            if size < 1024:
-                size_str = f"{size} B"
-            elif size < 1024 * 1024:
-                size_str = f"{size / 1024:.1f} KB"
+        for entry in entries:
+            if entry["type"] == "dir":
+                size_str = _format_size(entry["total_bytes"])
+                count = entry["file_count"]
+                details = f"{count} file{'s' if count != 1 else ''}"
+                lines.append(f"{entry['path'] + '/':<60} {size_str:>10} {details}")
             else:
-                size_str = f"{size / (1024 * 1024):.1f} MB"
+                file_type = "[binary]" if entry["is_binary"] else ""
+                size_str = _format_size(entry["size_bytes"])
+                lines.append(f"{entry['path']:<60} {size_str:>10} {file_type}")
 
-            file_type = "[binary]" if f["is_binary"] else ""
-            lines.append(f"{f['path']:<60} {size_str:>10} {file_type}")
+        if next_cursor is not None:
+            lines.append("")
+            lines.append(f'More entries: call ls again with cursor="{next_cursor}"')
 
         return "\n".join(lines)
 
     @mcp.tool()
-    def read(path: str) -> str:
+    def read(
+        path: str,
+        offset: int = 0,
+        length: int | None = None,
+        start_line: int | None = None,
+        end_line: int | None = None,
+    ) -> str:
         """Read a file's content from the docpack.
 
+        Large files are returned in parts: pass a line range (start_line,
+        end_line) or a character range (offset, length). Without a range,
+        files over MAX_READ_CHARS characters are cut off with a note.
+
         Args:
             path: Full path to the file (as shown in ls output)
+            offset: First character to read (0-based)
+            length: Number of characters to read
+            start_line: First line to read (1-based)
+            end_line: Last line to read (inclusive)
 
         Returns:
             File content for text files, or metadata for binary files
         """
-        result = store.read_file(path)
+        info = store.file_info(path)
 
-        if result is None:
+        if info is None:
             return f"Error: File not found: {path}"
 
-        if result["is_binary"]:
+        if info["is_binary"]:
             return (
                 f"[Binary file]\n"
-                f"  Path: {result['path']}\n"
-                f"  Size: {result['size_bytes']} bytes\n"
-                f"  Extension: {result['extension']}"
+                f"  Path: {info['path']}\n"
+                f"  Size: {info['size_bytes']} bytes\n"
+                f"  Extension: {info['extension']}"
+            )
+
+        if not info["has_content"]:
+            return (
+                f"[File content not stored: exceeds the docpack's size limit]\n"
+                f"  Path: {info['path']}\n"
+                f"  Size: {info['size_bytes']} bytes"
+            )
+
+        if start_line is not None or end_line is not None:
+            result = store.read_lines(path, start_line or 1, end_line)
+            if not result["text"]:
+                return f"[{path}: no lines in range, the file has {result['line_count']} lines]"
+            return (
+                f"[{path}: lines {result['start_line']}-{result['end_line']}"
+                f" of {result['line_count']}]\n{result['text']}"
+            )
+
+        if offset or length is not None:
+            result = store.read_range(path, offset, length)
+            # Report the range actually read: the store clamps the offset
+            start = min(result["offset"], result["total_chars"])
+            end = start + len(result["text"])
+            return (
+                f"[{path}: characters {start}-{end} of {result['total_chars']}]\n"
+                f"{result['text']}"
             )
 
-        return result["content"]
+        # size_bytes >= characters, so smaller files are returned whole
+        if info["size_bytes"] > MAX_READ_CHARS:
+            result = store.read_range(path, 0, MAX_READ_CHARS)
+            if result["total_chars"] > MAX_READ_CHARS:
+                return (
+                    f"{result['text']}\n"
+                    f"[{path}: showing characters 0-{MAX_READ_CHARS} of"
+                    f" {result['total_chars']}; pass offset/length or"
+                    f" start_line/end_line to read more]"
+                )
+            return result["text"]
+
+        return store.read_file(path)["content"]
+
+    @mcp.tool()
+    def search(query: str, limit: int = 20) -> str:
+        """Keyword search across the docpack.
+
+        Use this for exact identifiers, error messages or rare terms, which
+        semantic recall can miss. Finds chunks containing all of the words,
+        ranked by BM25.
+
+        Args:
+            query: Words to look for (e.g., "parse_config ValueError")
+            limit: Maximum number of results to return (default: 20)
+
+        Returns:
+            Ranked list of matching file chunks with relevance scores
+        """
+        results = store.search(query, limit=limit)
+
+        if not results:
+            return f"No results found for: {query}"
+
+        return _format_results(results, "score")
 
     @mcp.tool()
-    def recall(query: str, limit: int = 10) -> str:
+    def recall(query: str, limit: int = 10, mode: str = "semantic") -> str:
         """Semantic search across the docpack.
 
         Use this to find relevant content by concept, not just keyword.
@@ -94,28 +239,51 @@ def create_mcp_server(docpack_path: Path) -> FastMCP:
         Args:
             query: Natural language description of what you're looking for
             limit: Maximum number of results to return (default: 10)
+            mode: "semantic" (default), or "hybrid" to also rank chunks
+                containing the query's words (better for names and
+                identifiers)
 
         Returns:
             Ranked list of relevant file chunks with similarity scores
         """
+        if mode not in ("semantic", "hybrid"):
+            return f"Error: Unknown mode: {mode} (expected 'semantic' or 'hybrid')"
+
         query_embedding = embedder.embed([query])[0]
-        results = store.recall(query_embedding, limit=limit)
+        if mode == "hybrid":
+            results = store.hybrid_recall(query, query_embedding, limit=limit)
+        else:
+            results = store.recall(query_embedding, limit=limit)
 
         if not results:
             return f"No results found for: {query}"
 
-        lines = []
-        for i, r in enumerate(results, 1):
-            score = r["similarity"]
-            # Truncate long text snippets
-            text = r["text"][:200].replace("\n", " ")
-            if len(r["text"]) > 200:
-                text += "..."
-
-            lines.append(f"{i}. [{score:.3f}] {r['file_path']}")
-            lines.append(f"   {text}")
-            lines.append("")
-
-        return "\n".join(lines)
+        return _format_results(results, "score" if mode == "hybrid" else "similarity")
 
     return mcp
+
+
+def _format_results(results: list[dict], score_key: str) -> str:
+    """Format ranked chunks as numbered entries with a text snippet."""
+    lines = []
+    for i, r in enumerate(results, 1):
+        score = r[score_key]
+        # Truncate long text snippets
+        text = r["text"][:200].replace("\n", " ")
+        if len(r["text"]) > 200:
+            text += "..."
+
+        lines.append(f"{i}. [{score:.3f}] {r['file_path']}")
+        lines.append(f"   {text}")
+        lines.append("")
+
+    return "\n".join(lines)
+
+
+def _format_size(size: int) -> str:
+    """Format a byte count for listings."""
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
@@ -1,5 +1,6 @@
 """Storage layer for .docpack files."""
 
 from docpack.storage.store import DocPackStore
+from docpack.storage.writer import BulkWriter, ThreadedWriter
 
-__all__ = ["DocPackStore"]
+__all__ = ["DocPackStore", "BulkWriter", "ThreadedWriter"]
@@ -0,0 +1,173 @@
+"""Block-compressed file content."""
+
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Optional
+
+# Methods accepted by freeze --compress
+CONTENT_COMPRESSIONS = ("zlib", "zstd")
+
+# Content is compressed in independent blocks of this many characters, so
+# a ranged read inflates only the blocks it touches
+CONTENT_BLOCK_CHARS = 64 * 1024
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def split_blocks(content: str) -> list[str]:
+    """Split content into blocks of CONTENT_BLOCK_CHARS characters.
+
+    Empty content is one empty block, so every stored file has a block.
+    """
+    size = CONTENT_BLOCK_CHARS
+    return [content[i : i + size] for i in range(0, max(len(content), 1), size)]
+
+
+def compress(text: str, method: str) -> bytes:
+    """Compress one block of text (both methods release the GIL)."""
+    data = text.encode("utf-8")
+    if method == "zlib":
+        return zlib.compress(data, ZLIB_LEVEL)
+    if method == "zstd":
+        return _zstandard().ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    raise ValueError(f"Unknown content compression: {method}")
+
+
+def decompress(data: bytes, method: str) -> str:
+    """Inflate one block of text."""
+    if method == "zlib":
+        raw = zlib.decompress(data)
+    elif method == "zstd":
+        raw = _zstandard().ZstdDecompressor().decompress(data)
+    else:
+        raise ValueError(f"Unknown content compression: {method}")
+    return raw.decode("utf-8")
+
+
+def _zstandard():
+    """Import the optional zstandard package."""
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "zstd-compressed docpacks require the zstandard package "
+            "(pip install 'docpack[zstd]')"
+        ) from None
+    return zstandard
+
+
+class BlockCache:
+    """Thread-safe LRU of inflated content blocks, bounded in characters."""
+
+    DEFAULT_MAX_CHARS = 32 * 1024 * 1024
+
+    def __init__(self, max_chars: int = DEFAULT_MAX_CHARS):
+        """Initialize the cache.
+
+        Args:
+            max_chars: Most characters of inflated text to keep
+        """
+        self.max_chars = max_chars
+        self._blocks: OrderedDict[tuple[str, int], str] = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+
+    def get(self, path: str, block: int) -> Optional[str]:
+        """Return a cached block, marking it recently used."""
+        with self._lock:
+            text = self._blocks.get((path, block))
+            if text is not None:
+                self._blocks.move_to_end((path, block))
+            return text
+
+    def put(self, path: str, block: int, text: str) -> None:
+        """Cache a block, evicting the least recently used ones."""
+        with self._lock:
+            previous = self._blocks.pop((path, block), None)
+            if previous is not None:
+                self._chars -= len(previous)
+            self._blocks[(path, block)] = text
+            self._chars += len(text)
+            while self._chars > self.max_chars and len(self._blocks) > 1:
+                _, evicted = self._blocks.popitem(last=False)
+                self._chars -= len(evicted)
+
+    def clear(self) -> None:
+        """Drop every cached block."""
+        with self._lock:
+            self._blocks.clear()
+            self._chars = 0
+
+
+def read_chars(
+    conn: sqlite3.Connection,
+    path: str,
+    method: str,
+    cache: BlockCache,
+    start: int = 0,
+    end: Optional[int] = None,
+) -> str:
+    """Read characters [start, end) of a file's compressed content.
+
+    Only the blocks overlapping the range are inflated, and a range whose
+    blocks are all cached does not touch the database.
+    """
+    size = CONTENT_BLOCK_CHARS
+    first = start // size
+    if end is None:
+        query = "SELECT block, data FROM content_blocks WHERE path = ? AND block >= ?"
+        params: tuple = (path, first)
+        blocks: dict[int, Optional[str]] = {}
+    else:
+        if end <= start:
+            return ""
+        last = (end - 1) // size
+        query = """SELECT block, data FROM content_blocks
+                   WHERE path = ? AND block >= ? AND block <= ?"""
+        params = (path, first, last)
+        blocks = {block: cache.get(path, block) for block in range(first, last + 1)}
+
+    if end is None or None in blocks.values():
+        for block, data in conn.execute(query, params):
+            if blocks.get(block) is None:
+                blocks[block] = cache.get(path, block)
+            if blocks[block] is None:
+                blocks[block] = decompress(data, method)
+                cache.put(path, block, blocks[block])
+
+    text = "".join(blocks[block] or "" for block in sorted(blocks))
+    offset = start - first * size
+    return text[offset:] if end is None else text[offset : offset + end - start]
+
+
+def register_content_function(
+    conn: sqlite3.Connection, cache: BlockCache, method: Optional[str] = None
+) -> None:
+    """Define ``content_slice(path, start, end)`` on a connection.
+
+    Returns characters [start, end) of a file's compressed content, so SQL
+    such as CHUNK_ROWS can slice compact chunks out of compressed files.
+    NULL if the docpack is not compressed.
+
+    Args:
+        conn: Connection to define the function on
+        cache: Cache of inflated blocks
+        method: Compression method; looked up in the docpack's metadata on
+            first use if not given
+    """
+    methods = [method] if method else []
+
+    def content_slice(path: str, start: int, end: int) -> Optional[str]:
+        if not methods:
+            row = conn.execute(
+                "SELECT value FROM metadata WHERE key = 'content_compression'"
+            ).fetchone()
+            methods.append(row[0] if row else None)
+        if methods[0] is None:
+            return None
+        return read_chars(conn, path, methods[0], cache, start, end)
+
+    conn.create_function("content_slice", 3, content_slice)
@@ -0,0 +1,65 @@
+"""Line-offset index for reading line ranges of large files."""
+
+import sqlite3
+
+import numpy as np
+
+# Files smaller than this are read whole; their lines are split on demand
+LINE_INDEX_MIN_BYTES = 64 * 1024
+
+# Every LINE_INDEX_STEP-th line start is recorded, so a seek lands at most
+# that many lines before the wanted one (a 500k-line log needs ~60 KB)
+LINE_INDEX_STEP = 64
+
+OFFSET_DTYPE = np.dtype("<u8")
+
+
+def build_line_index(content: str) -> tuple[int, int, bytes, bytes]:
+    """Record the offsets of every LINE_INDEX_STEP-th line start.
+
+    Each recorded line start has its UTF-8 byte offset, for seeking in the
+    stored content, and its character offset, for character ranges. Lines
+    end at "\n" only, as in ``split_lines``.
+
+    Returns:
+        Tuple of (line count, character count, packed byte offsets,
+        packed character offsets)
+    """
+    data = np.frombuffer(content.encode("utf-8"), dtype=np.uint8)
+    starts = np.flatnonzero(data == ord("\n")) + 1
+    # An unterminated last line counts too
+    line_count = len(starts) + int(len(data) > 0 and data[-1] != ord("\n"))
+    offsets = np.concatenate(([0], starts[LINE_INDEX_STEP - 1 :: LINE_INDEX_STEP]))
+    offsets = offsets.astype(OFFSET_DTYPE)
+
+    if content.isascii():
+        char_offsets = offsets
+    else:
+        # Characters are the bytes that are not UTF-8 continuation bytes
+        is_char = (data & 0xC0) != 0x80
+        bounds = offsets[offsets < len(data)].astype(np.intp)
+        segments = np.add.reduceat(is_char, bounds, dtype=np.int64)
+        char_offsets = np.concatenate(([0], np.cumsum(segments)))[: len(offsets)]
+        char_offsets = char_offsets.astype(OFFSET_DTYPE)
+    return line_count, len(content), offsets.tobytes(), char_offsets.tobytes()
+
+
+def store_line_index(conn: sqlite3.Connection, path: str, content: str) -> None:
+    """Build and insert the line index of a file."""
+    line_count, char_count, offsets, char_offsets = build_line_index(content)
+    conn.execute(
+        """INSERT OR REPLACE INTO line_index
+           (path, line_count, char_count, step, offsets, char_offsets)
+           VALUES (?, ?, ?, ?, ?, ?)""",
+        (path, line_count, char_count, LINE_INDEX_STEP, offsets, char_offsets),
+    )
+
+
+def split_lines(text: str) -> list[str]:
+    """Split text after each "\\n", keeping the line ends."""
+    lines = text.split("\n")
+    last = lines.pop()
+    result = [line + "\n" for line in lines]
+    if last:
+        result.append(last)
+    return result
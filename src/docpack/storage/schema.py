@@ -1,23 +1,63 @@
 """Database schema for .docpack files."""
 
+import sqlite3
+
 SCHEMA = """
 -- File system table: stores file metadata and content
 CREATE TABLE IF NOT EXISTS files (
     path TEXT PRIMARY KEY,
-    content TEXT,              -- NULL for binary files
+    content TEXT,              -- NULL for binary and compressed files
     size_bytes INTEGER NOT NULL,
     extension TEXT,
-    is_binary INTEGER NOT NULL DEFAULT 0
+    is_binary INTEGER NOT NULL DEFAULT 0,
+    content_hash TEXT,         -- sha256 of content, for incremental updates
+    mtime REAL,                -- source modification time
+    file_id INTEGER,           -- compact integer id referenced by chunks
+    dir TEXT                   -- parent directory ("" at the root)
+);
+
+-- Directory tree: every directory that contains files, with totals over
+-- all files below it (rebuilt at the end of each freeze)
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,     -- no trailing slash; the root has no row
+    parent TEXT NOT NULL,      -- "" at the root
+    file_count INTEGER NOT NULL,
+    total_bytes INTEGER NOT NULL
 );
 
--- Chunks table: stores text chunks for semantic search
+-- Compressed file content (freeze --compress): independently compressed
+-- blocks of CONTENT_BLOCK_CHARS characters, in order
+CREATE TABLE IF NOT EXISTS content_blocks (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    block INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    FOREIGN KEY (path) REFERENCES files(path)
+);
+
+-- Line index of large text files, for ranged reads: the UTF-8 byte and
+-- character offsets of every step-th line start (packed uint64)
+CREATE TABLE IF NOT EXISTS line_index (
+    path TEXT PRIMARY KEY,
+    line_count INTEGER NOT NULL,
+    char_count INTEGER NOT NULL,
+    step INTEGER NOT NULL,
+    offsets BLOB NOT NULL,
+    char_offsets BLOB NOT NULL,
+    FOREIGN KEY (path) REFERENCES files(path)
+);
+
+-- Chunks table: stores text chunks for semantic search. In compact
+-- ("offsets") docpacks file_path and text are NULL: the chunk is
+-- files.content[start_char:end_char] of the file with this file_id.
 CREATE TABLE IF NOT EXISTS chunks (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
-    file_path TEXT NOT NULL,
+    file_path TEXT,
     chunk_index INTEGER NOT NULL,
-    text TEXT NOT NULL,
+    text TEXT,
     start_char INTEGER,
     end_char INTEGER,
+    file_id INTEGER,
     FOREIGN KEY (file_path) REFERENCES files(path)
 );
 
@@ -34,6 +74,75 @@ CREATE TABLE IF NOT EXISTS metadata (
     value TEXT
 );
 
+-- IVF index: cluster centroids (optional, built by freeze --index ivf)
+CREATE TABLE IF NOT EXISTS ivf_centroids (
+    list_id INTEGER PRIMARY KEY,
+    centroid BLOB NOT NULL
+);
+
+-- IVF index: inverted list of each vector
+CREATE TABLE IF NOT EXISTS ivf_lists (
+    chunk_id INTEGER PRIMARY KEY,
+    list_id INTEGER NOT NULL,
+    FOREIGN KEY (chunk_id) REFERENCES chunks(id),
+    FOREIGN KEY (list_id) REFERENCES ivf_centroids(list_id)
+);
+
+-- Binary index: packed sign bits of each vector (optional, freeze --index binary)
+CREATE TABLE IF NOT EXISTS binary_codes (
+    chunk_id INTEGER PRIMARY KEY,
+    code BLOB NOT NULL,
+    FOREIGN KEY (chunk_id) REFERENCES chunks(id)
+);
+
 -- Indexes for efficient queries
 CREATE INDEX IF NOT EXISTS idx_chunks_file ON chunks(file_path);
+CREATE INDEX IF NOT EXISTS idx_dirs_parent ON dirs(parent, path);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_content_blocks ON content_blocks(path, block);
+"""
+
+# Columns added after the first release: (table, column, type).
+# Applied to existing docpacks by DocPackStore.initialize().
+ADDED_COLUMNS = [
+    ("files", "content_hash", "TEXT"),
+    ("files", "mtime", "REAL"),
+    ("files", "file_id", "INTEGER"),
+    ("chunks", "file_id", "INTEGER"),
+    ("files", "dir", "TEXT"),
+]
+
+# Indexes on added columns, created once the columns exist
+ADDED_INDEXES = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_files_file_id ON files(file_id);
+CREATE INDEX IF NOT EXISTS idx_chunks_file_id ON chunks(file_id);
+CREATE INDEX IF NOT EXISTS idx_files_dir ON files(dir, path);
 """
+
+# Full-text (BM25) index over chunk text. Contentless: it stores only the
+# inverted index, keyed by chunk id, and text is read from the chunks.
+# Created separately because SQLite may be built without FTS5.
+FTS_TABLE = "chunks_fts"
+FTS_SCHEMA = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(text, content='');
+"""
+
+# Chunk path and text for both storage modes: compact chunks are sliced
+# from their file's content (substr is 1-based and counts characters,
+# like Python string offsets), or from its compressed blocks by the
+# content_slice function that DocPackStore and BulkWriter connections define
+CHUNK_ROWS = """
+SELECT c.id AS id,
+       COALESCE(c.file_path, f.path) AS file_path,
+       COALESCE(
+           c.text,
+           substr(f.content, c.start_char + 1, c.end_char - c.start_char),
+           content_slice(f.path, c.start_char, c.end_char)
+       ) AS text
+FROM chunks c LEFT JOIN files f ON f.file_id = c.file_id
+"""
+
+
+def has_table(conn: sqlite3.Connection, name: str) -> bool:
+    """Check whether a table (or virtual table) exists."""
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+    return row is not None
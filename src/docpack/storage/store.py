@@ -1,27 +1,117 @@
 """SQLite-backed storage for .docpack files."""
 
+import fnmatch
+import heapq
+import json
+import os
+import queue
+import re
 import sqlite3
+import threading
 from contextlib import contextmanager
 from pathlib import Path
 from typing import Iterator, Optional
 
 import numpy as np
 
+from docpack.index import VECTOR_DTYPES, BinaryIndex, IVFIndex, dequantize, score
 from docpack.models import Chunk, Document
-from docpack.storage.schema import SCHEMA
+from docpack.storage.compression import BlockCache, read_chars, register_content_function
+from docpack.storage.lines import (
+    LINE_INDEX_MIN_BYTES,
+    OFFSET_DTYPE,
+    split_lines,
+    store_line_index,
+)
+from docpack.storage.schema import (
+    ADDED_COLUMNS,
+    ADDED_INDEXES,
+    CHUNK_ROWS,
+    FTS_SCHEMA,
+    FTS_TABLE,
+    SCHEMA,
+    has_table,
+)
+from docpack.storage.writer import BulkWriter, parent_dir
+
+# Suffix of the memory-mappable embedding sidecar written next to a docpack
+SIDECAR_SUFFIX = ".vectors"
+
+# The matrix region of the sidecar starts on a page boundary
+SIDECAR_ALIGNMENT = 4096
+
+# Bytes of the docpack memory-mapped by read-only connections
+READ_ONLY_MMAP_SIZE = 1 << 30
 
 
 class DocPackStore:
-    """SQLite-backed storage for .docpack files."""
+    """SQLite-backed storage for .docpack files.
+
+    In read-only mode (used when serving) the file is opened with
+    ``mode=ro&immutable=1`` and a small pool of persistent, memory-mapped
+    connections is shared across threads, so each query reuses an open
+    connection and its cached prepared statements. A thread that already
+    holds a pooled connection gets the same one back from a nested
+    ``connection()``, so helpers may query while their caller holds one.
+    """
+
+    DEFAULT_POOL_SIZE = 4
+
+    def __init__(
+        self,
+        path: Path | str,
+        read_only: bool = False,
+        pool_size: int = DEFAULT_POOL_SIZE,
+    ):
+        """Initialize the store.
 
-    def __init__(self, path: Path | str):
+        Args:
+            path: Path to the .docpack file
+            read_only: Open read-only with a persistent connection pool
+            pool_size: Maximum number of pooled connections (read-only mode)
+        """
         self.path = Path(path)
+        self.read_only = read_only
+        self.pool_size = pool_size
+        self._pool: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._pool_opened = 0
+        self._pool_lock = threading.Lock()
+        # Pooled connection held by the current thread, if any
+        self._held = threading.local()
+        # (chunk_ids, matrix, int8 scales), published together once loaded
+        self._vectors: Optional[tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]] = None
+        # Serializes loading the vectors and the index (the server loads
+        # them on a warm-up thread while tools already run)
+        self._vectors_lock = threading.RLock()
+        self._ann: Optional[IVFIndex | BinaryIndex] = None
+        self._ann_loaded = False
+        self._block_cache = BlockCache()
 
     @contextmanager
     def connection(self) -> Iterator[sqlite3.Connection]:
-        """Context manager for database connections."""
+        """Context manager for database connections.
+
+        Read-only connections are reentrant per thread: a nested call
+        yields the connection the thread already holds instead of waiting
+        for another one from the pool.
+        """
+        if self.read_only:
+            held = getattr(self._held, "conn", None)
+            if held is not None:
+                yield held
+                return
+            conn = self._acquire()
+            self._held.conn = conn
+            try:
+                yield conn
+            finally:
+                self._held.conn = None
+                self._pool.put(conn)
+            return
+
         conn = sqlite3.connect(self.path)
         conn.row_factory = sqlite3.Row
+        register_content_function(conn, self._block_cache)
         try:
             yield conn
             conn.commit()
@@ -31,10 +121,112 @@ class DocPackStore:
         finally:
             conn.close()
 
+    def close(self) -> None:
+        """Close pooled read-only connections."""
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._pool_lock:
+                self._pool_opened -= 1
+
+    def _acquire(self) -> sqlite3.Connection:
+        """Take a pooled read-only connection, opening one if allowed."""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._pool_lock:
+            can_open = self._pool_opened < self.pool_size
+            if can_open:
+                self._pool_opened += 1
+        if not can_open:
+            return self._pool.get()
+
+        try:
+            uri = f"{self.path.absolute().as_uri()}?mode=ro&immutable=1"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute(f"PRAGMA mmap_size = {READ_ONLY_MMAP_SIZE}")
+            register_content_function(conn, self._block_cache)
+        except Exception:
+            with self._pool_lock:
+                self._pool_opened -= 1
+            raise
+        return conn
+
     def initialize(self) -> None:
-        """Create schema if not exists."""
+        """Create schema if not exists, adding columns missing from older docpacks."""
         with self.connection() as conn:
+            had_line_index = has_table(conn, "line_index")
             conn.executescript(SCHEMA)
+            for table, column, column_type in ADDED_COLUMNS:
+                if column not in _columns(conn, table):
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+            conn.executescript(ADDED_INDEXES)
+
+            if not had_line_index:
+                # Older docpack: index the large files it already has
+                rows = conn.execute(
+                    """SELECT path, content FROM files
+                       WHERE content IS NOT NULL AND size_bytes >= ?""",
+                    (LINE_INDEX_MIN_BYTES,),
+                ).fetchall()
+                for row in rows:
+                    store_line_index(conn, row["path"], row["content"])
+
+            if not has_table(conn, FTS_TABLE):
+                try:
+                    conn.executescript(FTS_SCHEMA)
+                except sqlite3.OperationalError:
+                    return  # SQLite without FTS5: search falls back to LIKE
+                # Older docpack: index the chunks it already has
+                conn.execute(
+                    f"INSERT INTO {FTS_TABLE} (rowid, text) SELECT id, text FROM ({CHUNK_ROWS})"
+                )
+
+    @contextmanager
+    def bulk_writer(
+        self,
+        commit_every: int = BulkWriter.DEFAULT_COMMIT_EVERY,
+        journal_mode: str = "OFF",
+        compact: bool = False,
+        compression: Optional[str] = None,
+        vacuum_min_free: float = 0.0,
+    ) -> Iterator[BulkWriter]:
+        """Context manager for a single-connection bulk writing session.
+
+        Used while freezing: the writer holds one connection with
+        build-time pragmas and commits every ``commit_every`` files. The
+        session finishes with ANALYZE and VACUUM.
+
+        Args:
+            commit_every: Number of files between commits
+            journal_mode: "OFF" for fresh builds, "WAL" when updating an
+                existing docpack that must survive a crash
+            compact: Store chunks as offsets into their file's content
+            compression: Store text content compressed ("zlib" or "zstd")
+            vacuum_min_free: Skip the VACUUM unless at least this fraction
+                of the pages is free (e.g. when updating)
+        """
+        writer = BulkWriter(
+            self.path,
+            commit_every=commit_every,
+            journal_mode=journal_mode,
+            compact=compact,
+            compression=compression,
+        )
+        try:
+            yield writer
+            writer.finalize(vacuum_min_free=vacuum_min_free)
+        finally:
+            writer.close()
+            self._vectors = None
+            self._ann_loaded = False
+            self._block_cache.clear()
 
     def store_document(self, doc: Document) -> None:
         """Store a document and its metadata."""
@@ -79,6 +271,8 @@ class DocPackStore:
                     "INSERT INTO vectors (chunk_id, embedding) VALUES (?, ?)",
                     (chunk_id, embedding.astype(np.float32).tobytes()),
                 )
+        self._vectors = None
+        self._ann_loaded = False
 
     def set_metadata(self, key: str, value: str) -> None:
         """Store a metadata key-value pair."""
@@ -88,6 +282,119 @@ class DocPackStore:
                 (key, value),
             )
 
+    def write_vector_sidecar(self) -> Path:
+        """Write the embedding matrix to a memory-mappable sidecar file.
+
+        Layout: chunk ids as little-endian int64, zero padding up to a page
+        boundary, then the row-major matrix in the docpack's vector dtype.
+        The file name and shape are recorded in the metadata table so
+        readers can map the matrix instead of pulling every
+        ``vectors.embedding`` BLOB.
+
+        Returns:
+            Path of the written sidecar file
+        """
+        chunk_ids, matrix = self._load_vector_blobs()
+        sidecar = self.path.with_name(self.path.name + SIDECAR_SUFFIX)
+        offset = -(-chunk_ids.nbytes // SIDECAR_ALIGNMENT) * SIDECAR_ALIGNMENT
+
+        tmp_path = sidecar.with_name(sidecar.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(chunk_ids.astype("<i8").tobytes())
+            f.write(b"\0" * (offset - chunk_ids.nbytes))
+            f.write(np.ascontiguousarray(matrix).tobytes())
+        os.replace(tmp_path, sidecar)
+
+        self.set_metadata("vector_sidecar", sidecar.name)
+        self.set_metadata("vector_count", str(matrix.shape[0]))
+        self.set_metadata("vector_dim", str(matrix.shape[1]))
+        self.set_metadata("vector_sidecar_offset", str(offset))
+        self.set_metadata("vector_sidecar_stamp", self._vector_stamp())
+        self._vectors = None
+        return sidecar
+
+    def build_ivf_index(self, n_lists: Optional[int] = None, seed: int = 0) -> int:
+        """Cluster the stored embeddings into an IVF index.
+
+        Replaces any existing index. ``recall`` uses the index once built.
+
+        Args:
+            n_lists: Number of inverted lists (default: sqrt of vector count)
+            seed: Random seed for k-means
+
+        Returns:
+            Number of lists built (0 if there are no vectors)
+        """
+        chunk_ids, matrix = self.vector_matrix()
+        with self.connection() as conn:
+            self._drop_ann_index(conn)
+            if len(chunk_ids) == 0:
+                return 0
+
+            index = IVFIndex.build(
+                dequantize(matrix, self.vector_scales()), n_lists=n_lists, seed=seed
+            )
+            conn.executemany(
+                "INSERT INTO ivf_centroids (list_id, centroid) VALUES (?, ?)",
+                ((i, c.tobytes()) for i, c in enumerate(index.centroids)),
+            )
+            conn.executemany(
+                "INSERT INTO ivf_lists (chunk_id, list_id) VALUES (?, ?)",
+                zip(chunk_ids.tolist(), index.assignments.tolist()),
+            )
+            conn.execute(
+                "INSERT INTO metadata (key, value) VALUES ('ann_index', 'ivf')"
+            )
+
+        self._ann = index
+        self._ann_loaded = True
+        return index.n_lists
+
+    def build_binary_index(self) -> int:
+        """Store packed sign-bit codes of the embeddings as a binary index.
+
+        Replaces any existing index. ``recall`` then shortlists candidates
+        by Hamming distance and re-ranks them at full precision.
+
+        Returns:
+            Number of codes stored
+        """
+        chunk_ids, matrix = self.vector_matrix()
+        with self.connection() as conn:
+            self._drop_ann_index(conn)
+            if len(chunk_ids) == 0:
+                return 0
+
+            index = BinaryIndex.build(matrix)
+            conn.executemany(
+                "INSERT INTO binary_codes (chunk_id, code) VALUES (?, ?)",
+                (
+                    (chunk_id, code.tobytes())
+                    for chunk_id, code in zip(chunk_ids.tolist(), index.codes)
+                ),
+            )
+            conn.execute(
+                "INSERT INTO metadata (key, value) VALUES ('ann_index', 'binary')"
+            )
+
+        self._ann = index
+        self._ann_loaded = True
+        return len(chunk_ids)
+
+    @staticmethod
+    def _drop_ann_index(conn: sqlite3.Connection) -> None:
+        """Delete every approximate index table and the ann_index marker."""
+        conn.execute("DELETE FROM ivf_lists")
+        conn.execute("DELETE FROM ivf_centroids")
+        conn.execute("DELETE FROM binary_codes")
+        conn.execute("DELETE FROM metadata WHERE key = 'ann_index'")
+
+    def file_states(self) -> dict[str, tuple[int, Optional[float], Optional[str]]]:
+        """Return (size_bytes, mtime, content_hash) for every stored file."""
+        with self.connection() as conn:
+            cursor = conn.execute("SELECT path, size_bytes, mtime, content_hash FROM files")
+            return {row[0]: (row[1], row[2], row[3]) for row in cursor}
+
     def get_metadata(self, key: str) -> Optional[str]:
         """Retrieve a metadata value by key."""
         with self.connection() as conn:
@@ -99,52 +406,776 @@ class DocPackStore:
     # Query methods for MCP tools
 
     def list_files(self, path_prefix: str = "") -> list[dict]:
-        """List files matching prefix (for ls tool)."""
+        """List files whose path starts with a prefix, in path order."""
+        condition, params = _prefix_range("path", path_prefix)
         with self.connection() as conn:
             cursor = conn.execute(
-                """SELECT path, size_bytes, extension, is_binary
-                   FROM files WHERE path LIKE ? ORDER BY path""",
-                (f"{path_prefix}%",),
+                f"""SELECT path, size_bytes, extension, is_binary
+                    FROM files WHERE {condition} ORDER BY path""",
+                params,
             )
             return [dict(row) for row in cursor]
 
+    def list_dir(
+        self,
+        path: str = "",
+        depth: int = 1,
+        pattern: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> tuple[list[dict], Optional[str]]:
+        """List the files and directories under a directory (for ls tool).
+
+        Direct children come from the ``files.dir`` and ``dirs.parent``
+        indexes, deeper listings from a range scan over the sorted paths.
+        Entries are returned in path order, so a listing is paged by
+        passing the returned cursor back in.
+
+        Args:
+            path: Directory to list ("" for the root)
+            depth: Levels below the directory to include (0 for all)
+            pattern: Glob matched against entry names, or against paths
+                relative to the directory if it contains "/"
+            limit: Maximum number of entries (None for all)
+            cursor: Cursor returned by a previous call, to continue after it
+
+        Returns:
+            Tuple of (entries, next cursor or None). Entries are dicts with
+            type ("dir" or "file") and path; directories also have
+            file_count and total_bytes (over all files below them), files
+            have size_bytes, extension and is_binary.
+        """
+        base = path.strip("/")
+        base = "" if base == "." else base
+        prefix = f"{base}/" if base else ""
+        if limit is not None and limit <= 0:
+            return [], cursor
+
+        with self.connection() as conn:
+            if has_table(conn, "dirs") and "dir" in _columns(conn, "files"):
+                entries = self._indexed_entries(conn, base, depth, cursor)
+            else:
+                entries = _derived_entries(conn, base, depth, cursor)
+
+            results = []
+            for entry in entries:
+                relative = entry["path"][len(prefix) :]
+                if pattern and not fnmatch.fnmatchcase(
+                    relative if "/" in pattern else relative.rpartition("/")[2], pattern
+                ):
+                    continue
+                if limit is not None and len(results) == limit:
+                    return results, results[-1]["path"]
+                results.append(entry)
+        return results, None
+
+    @staticmethod
+    def _indexed_entries(
+        conn: sqlite3.Connection, base: str, depth: int, cursor: Optional[str]
+    ) -> Iterator[dict]:
+        """Stream entries under a directory from the files and dirs tables."""
+        after = "AND path > ?" if cursor is not None else ""
+        extra = (cursor,) if cursor is not None else ()
+        if depth == 1:
+            dirs_where, files_where = "parent = ?", "dir = ?"
+            dirs_params = files_params = (base,)
+        else:
+            condition, params = _prefix_range("path", f"{base}/" if base else "")
+            dirs_where, dirs_params = condition, params
+            if depth <= 0:
+                files_where, files_params = condition, params
+            else:
+                # Only files in directories above the depth limit, rather
+                # than scanning every file below
+                parents = [base] + [
+                    row[0]
+                    for row in conn.execute(f"SELECT path FROM dirs WHERE {condition}", params)
+                    if _level(base, row[0]) < depth
+                ]
+                files_where = "dir IN (SELECT value FROM json_each(?))"
+                files_params = (json.dumps(parents),)
+
+        dirs = conn.execute(
+            f"""SELECT path, file_count, total_bytes FROM dirs
+                WHERE {dirs_where} {after} ORDER BY path""",
+            (*dirs_params, *extra),
+        )
+        files = conn.execute(
+            f"""SELECT path, size_bytes, extension, is_binary FROM files
+                WHERE {files_where} {after} ORDER BY path""",
+            (*files_params, *extra),
+        )
+        entries = heapq.merge(
+            ({"type": "dir", **row} for row in map(dict, dirs)),
+            ({"type": "file", **row} for row in map(dict, files)),
+            key=lambda entry: entry["path"],
+        )
+        for entry in entries:
+            if depth <= 0 or _level(base, entry["path"]) <= depth:
+                yield entry
+
     def read_file(self, path: str) -> Optional[dict]:
-        """Read file content and metadata (for read tool)."""
+        """Read file content and metadata (for read tool).
+
+        Compressed content is inflated through the store's block cache, so
+        repeated reads of a file do not decompress it again.
+        """
+        compression = self._content_compression()
         with self.connection() as conn:
             row = conn.execute(
-                "SELECT path, content, size_bytes, extension, is_binary FROM files WHERE path = ?",
+                f"""SELECT f.path, f.content, f.size_bytes, f.extension, f.is_binary,
+                           {_has_content_sql(compression)} AS has_content
+                    FROM files f WHERE f.path = ?""",
+                (path,),
+            ).fetchone()
+            if row is None:
+                return None
+            result = dict(row)
+            if result.pop("has_content") and result["content"] is None:
+                result["content"] = read_chars(conn, path, compression, self._block_cache)
+            return result
+
+    def file_info(self, path: str) -> Optional[dict]:
+        """Return a file's metadata without reading its content."""
+        has_content_sql = _has_content_sql(self._content_compression())
+        with self.connection() as conn:
+            row = conn.execute(
+                f"""SELECT f.path, f.size_bytes, f.extension, f.is_binary,
+                           {has_content_sql} AS has_content
+                    FROM files f WHERE f.path = ?""",
                 (path,),
             ).fetchone()
             return dict(row) if row else None
 
-    def recall(self, query_embedding: np.ndarray, limit: int = 10) -> list[dict]:
-        """Find similar chunks by embedding (for recall tool)."""
+    def content_stats(self) -> dict:
+        """Return the size of the stored text content, raw and as stored.
+
+        Returns:
+            Dict with compression (None if uncompressed), files (with
+            stored content), content_bytes (uncompressed) and stored_bytes
+        """
+        compression = self._content_compression()
         with self.connection() as conn:
-            cursor = conn.execute(
-                """SELECT c.id, c.file_path, c.text, v.embedding
-                   FROM chunks c JOIN vectors v ON c.id = v.chunk_id"""
+            files, content_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM files WHERE content IS NOT NULL"
+            ).fetchone()
+            stored_bytes = content_bytes
+            if compression:
+                compressed = conn.execute(
+                    """SELECT COUNT(*), COALESCE(SUM(size_bytes), 0),
+                              (SELECT COALESCE(SUM(length(data)), 0) FROM content_blocks)
+                       FROM files WHERE content IS NULL
+                       AND path IN (SELECT path FROM content_blocks)"""
+                ).fetchone()
+                files += compressed[0]
+                content_bytes += compressed[1]
+                stored_bytes += compressed[2]
+        return {
+            "compression": compression,
+            "files": files,
+            "content_bytes": content_bytes,
+            "stored_bytes": stored_bytes,
+        }
+
+    def read_range(
+        self, path: str, offset: int = 0, length: Optional[int] = None
+    ) -> Optional[dict]:
+        """Read part of a file's content by character offset.
+
+        Large files seek through their line index and read only the bytes
+        around the range, through incremental BLOB I/O. Smaller files are
+        sliced by SQLite, and compressed files inflate only the blocks
+        overlapping the range.
+
+        Args:
+            path: File path
+            offset: 0-based offset of the first character
+            length: Number of characters (None for the rest of the file)
+
+        Returns:
+            Dict with path, text, offset and total_chars, or None if the
+            file does not exist or has no stored content
+        """
+        offset = max(offset, 0)
+        compression = self._content_compression()
+        with self.connection() as conn:
+            row = _line_index(conn, path, compression)
+            if row is None:
+                return None
+
+            compression = compression if row["compressed"] else None
+            if row["offsets"] is None and compression:
+                content = read_chars(conn, path, compression, self._block_cache)
+                total_chars = len(content)
+                end = None if length is None else offset + max(length, 0)
+                text = content[offset:end]
+            elif row["offsets"] is None:
+                if length is None:
+                    text_sql, params = "substr(content, ?)", (offset + 1,)
+                else:
+                    text_sql, params = "substr(content, ?, ?)", (offset + 1, max(length, 0))
+                text, total_chars = conn.execute(
+                    f"SELECT {text_sql}, length(content) FROM files WHERE rowid = ?",
+                    (*params, row["rowid"]),
+                ).fetchone()
+            else:
+                total_chars = row["char_count"]
+                end = total_chars if length is None else min(offset + max(length, 0), total_chars)
+                text = ""
+                if offset < end and compression:
+                    text = read_chars(conn, path, compression, self._block_cache, offset, end)
+                elif offset < end:
+                    offsets = np.frombuffer(row["offsets"], dtype=OFFSET_DTYPE)
+                    char_offsets = np.frombuffer(row["char_offsets"], dtype=OFFSET_DTYPE)
+                    first = int(np.searchsorted(char_offsets, offset, side="right")) - 1
+                    after = int(np.searchsorted(char_offsets, end, side="left"))
+                    data = _read_blob(conn, row["rowid"], offsets, first, after)
+                    skip = offset - int(char_offsets[first])
+                    text = data.decode("utf-8")[skip : skip + end - offset]
+
+        return {"path": path, "text": text, "offset": offset, "total_chars": total_chars}
+
+    def read_lines(
+        self, path: str, start_line: int = 1, end_line: Optional[int] = None
+    ) -> Optional[dict]:
+        """Read a range of lines of a file.
+
+        Large files have a line index, so the range is located from the
+        nearest recorded line start and only its bytes (or, if compressed,
+        its blocks) are read. Smaller files are read whole and split.
+
+        Args:
+            path: File path
+            start_line: First line (1-based)
+            end_line: Last line, inclusive (None for the end of the file)
+
+        Returns:
+            Dict with path, text, start_line, end_line and line_count, or
+            None if the file does not exist or has no stored content
+        """
+        start_line = max(start_line, 1)
+        compression = self._content_compression()
+        with self.connection() as conn:
+            row = _line_index(conn, path, compression)
+            if row is None:
+                return None
+
+            compression = compression if row["compressed"] else None
+            if row["offsets"] is None:
+                if compression:
+                    content = read_chars(conn, path, compression, self._block_cache)
+                else:
+                    content = conn.execute(
+                        "SELECT content FROM files WHERE rowid = ?", (row["rowid"],)
+                    ).fetchone()[0]
+                lines = split_lines(content)
+                line_count = len(lines)
+                selected = lines[start_line - 1 : end_line]
+            else:
+                line_count, step = row["line_count"], row["step"]
+                last_line = line_count if end_line is None else min(end_line, line_count)
+                selected = []
+                if start_line <= last_line:
+                    first = (start_line - 1) // step
+                    after = -(-last_line // step)  # checkpoint at or past the range end
+                    if compression:
+                        char_offsets = np.frombuffer(row["char_offsets"], dtype=OFFSET_DTYPE)
+                        begin = int(char_offsets[first])
+                        stop = (
+                            int(char_offsets[after])
+                            if after < len(char_offsets)
+                            else row["char_count"]
+                        )
+                        text = read_chars(conn, path, compression, self._block_cache, begin, stop)
+                    else:
+                        offsets = np.frombuffer(row["offsets"], dtype=OFFSET_DTYPE)
+                        text = _read_blob(conn, row["rowid"], offsets, first, after).decode("utf-8")
+                    skip = start_line - 1 - first * step
+                    lines = split_lines(text)
+                    selected = lines[skip : skip + last_line - start_line + 1]
+
+        return {
+            "path": path,
+            "text": "".join(selected),
+            "start_line": start_line,
+            "end_line": start_line + len(selected) - 1,
+            "line_count": line_count,
+        }
+
+    def _content_compression(self) -> Optional[str]:
+        """Return the docpack's content compression method, if any."""
+        return self.get_metadata("content_compression")
+
+    def recall(
+        self,
+        query_embedding: np.ndarray,
+        limit: int = 10,
+        exact: bool = False,
+        nprobe: Optional[int] = None,
+        shortlist: Optional[int] = None,
+    ) -> list[dict]:
+        """Find similar chunks by embedding (for recall tool).
+
+        Uses the docpack's IVF or binary index when it has one, otherwise
+        scores the query against the whole vector matrix with a single
+        matrix-vector product. Text is only fetched for the winning chunks.
+
+        Args:
+            query_embedding: Query vector
+            limit: Maximum number of results
+            exact: Always use the brute-force scan, even if an index exists
+            nprobe: Number of IVF lists to scan (default: IVFIndex.DEFAULT_NPROBE)
+            shortlist: Binary index candidates to re-rank at full precision
+                (default: BinaryIndex.DEFAULT_SHORTLIST)
+        """
+        chunk_ids, matrix, scales = self._vector_state()
+        if limit <= 0 or len(chunk_ids) == 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        # Stored embeddings are normalized at embed time, so a dot product
+        # against the normalized query is the cosine similarity.
+        query = query / norm
+
+        index = None if exact else self._ann_index()
+        if isinstance(index, IVFIndex):
+            top, scores = index.search(matrix, query, limit, nprobe=nprobe, scales=scales)
+        elif isinstance(index, BinaryIndex):
+            top, scores = index.search(
+                matrix, query, limit, shortlist=shortlist, scales=scales
             )
+        else:
+            scores = score(matrix, query, scales)
+            k = min(limit, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            scores = scores[top]
 
-            results = []
-            for row in cursor:
-                stored_emb = np.frombuffer(row["embedding"], dtype=np.float32)
-                similarity = self._cosine_similarity(query_embedding, stored_emb)
-                results.append(
+        top_ids = [int(chunk_ids[i]) for i in top]
+        texts = self._chunk_texts(top_ids)
+        results = []
+        for chunk_id, similarity in zip(top_ids, scores):
+            row = texts.get(chunk_id)
+            if row is None:
+                continue
+            results.append(
+                {
+                    "chunk_id": chunk_id,
+                    "file_path": row["file_path"],
+                    "text": row["text"],
+                    "similarity": float(similarity),
+                }
+            )
+        return results
+
+    def search(self, query: str, limit: int = 20, match_any: bool = False) -> list[dict]:
+        """Find chunks containing the query's words, ranked by BM25 (for search tool).
+
+        Words are matched as literal tokens (FTS5 syntax in the query is not
+        interpreted). Docpacks without a full-text index fall back to an
+        unranked substring scan.
+
+        Args:
+            query: Words to look for
+            limit: Maximum number of results
+            match_any: Match chunks containing any of the words instead of
+                all of them
+
+        Returns:
+            List of dicts with chunk_id, file_path, text and score (higher
+            is better)
+        """
+        terms = query.split()
+        if limit <= 0 or not terms:
+            return []
+
+        # Built before taking a connection: _chunk_rows reads the metadata
+        chunk_rows = self._chunk_rows()
+        with self.connection() as conn:
+            if not has_table(conn, FTS_TABLE):
+                return _search_like(conn, chunk_rows, terms, limit, match_any)
+            expression = (" OR " if match_any else " AND ").join(
+                '"' + term.replace('"', '""') + '"' for term in terms
+            )
+            hits = conn.execute(
+                f"""SELECT rowid, bm25({FTS_TABLE}) AS rank FROM {FTS_TABLE}
+                    WHERE {FTS_TABLE} MATCH ? ORDER BY rank LIMIT ?""",
+                (expression, limit),
+            ).fetchall()
+
+        texts = self._chunk_texts([hit["rowid"] for hit in hits])
+        results = []
+        for hit in hits:
+            row = texts.get(hit["rowid"])
+            if row is None:
+                continue
+            results.append(
+                {
+                    "chunk_id": row["id"],
+                    "file_path": row["file_path"],
+                    "text": row["text"],
+                    # bm25() is lower for better matches
+                    "score": -hit["rank"],
+                }
+            )
+        return results
+
+    def hybrid_recall(
+        self,
+        query: str,
+        query_embedding: np.ndarray,
+        limit: int = 10,
+        candidates: int = 50,
+        k: int = 60,
+    ) -> list[dict]:
+        """Combine semantic and lexical matches with reciprocal rank fusion.
+
+        Each chunk scores ``sum(1 / (k + rank))`` over the two rankings, so
+        chunks found by both rank first, and exact identifiers that the
+        embedding model blurs are still found by the lexical side.
+
+        Args:
+            query: Query text
+            query_embedding: Embedding of the query text
+            limit: Maximum number of results
+            candidates: Results taken from each ranking before fusion
+            k: Rank-fusion constant; larger values flatten the rank weights
+
+        Returns:
+            List of dicts with chunk_id, file_path, text and score
+        """
+        if limit <= 0:
+            return []
+        fused: dict[int, dict] = {}
+        rankings = (
+            self.recall(query_embedding, limit=candidates),
+            self.search(query, limit=candidates, match_any=True),
+        )
+        for ranking in rankings:
+            for rank, result in enumerate(ranking, start=1):
+                entry = fused.setdefault(
+                    result["chunk_id"],
                     {
-                        "file_path": row["file_path"],
-                        "text": row["text"],
-                        "similarity": float(similarity),
-                    }
+                        "chunk_id": result["chunk_id"],
+                        "file_path": result["file_path"],
+                        "text": result["text"],
+                        "score": 0.0,
+                    },
                 )
+                entry["score"] += 1.0 / (k + rank)
+        return sorted(fused.values(), key=lambda r: r["score"], reverse=True)[:limit]
 
-            results.sort(key=lambda x: x["similarity"], reverse=True)
-            return results[:limit]
+    def vector_matrix(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return all embeddings as one contiguous float32 matrix (cached).
 
-    @staticmethod
-    def _cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
-        """Compute cosine similarity between two vectors."""
-        norm_a = np.linalg.norm(a)
-        norm_b = np.linalg.norm(b)
-        if norm_a == 0 or norm_b == 0:
-            return 0.0
-        return float(np.dot(a, b) / (norm_a * norm_b))
+        Maps the vector sidecar when the docpack has a valid one, otherwise
+        loads the ``vectors`` table. The matrix keeps the docpack's storage
+        dtype (float32, float16 or int8); int8 rows are scaled by
+        ``vector_scales()``.
+
+        Returns:
+            Tuple of (chunk_ids, matrix) where ``chunk_ids[i]`` is the id of
+            the chunk whose embedding is ``matrix[i]``.
+        """
+        chunk_ids, matrix, _ = self._vector_state()
+        return chunk_ids, matrix
+
+    def vector_scales(self) -> Optional[np.ndarray]:
+        """Return the per-dimension scales of int8 vectors, or None."""
+        return self._vector_state()[2]
+
+    def _vector_state(self) -> tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        """Return (chunk_ids, matrix, scales), loading them on first use.
+
+        They are loaded once under a lock and published as one tuple, so a
+        concurrent reader never sees a matrix without its scales.
+        """
+        state = self._vectors
+        if state is None:
+            with self._vectors_lock:
+                state = self._vectors
+                if state is None:
+                    chunk_ids, matrix = self._map_vector_sidecar() or self._load_vector_blobs()
+                    scales = self.get_metadata("vector_scales")
+                    state = self._vectors = (
+                        chunk_ids,
+                        matrix,
+                        np.asarray(json.loads(scales), dtype=np.float32) if scales else None,
+                    )
+        return state
+
+    def _vector_dtype(self) -> np.dtype:
+        """Return the storage dtype of the docpack's embeddings."""
+        return VECTOR_DTYPES[self.get_metadata("vector_dtype") or "float32"]
+
+    def _map_vector_sidecar(self) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """Memory-map the vector sidecar, or None if missing or stale."""
+        name = self.get_metadata("vector_sidecar")
+        if not name:
+            return None
+
+        sidecar = self.path.with_name(name)
+        try:
+            count = int(self.get_metadata("vector_count") or "")
+            dim = int(self.get_metadata("vector_dim") or "")
+            offset = int(self.get_metadata("vector_sidecar_offset") or "")
+            size = sidecar.stat().st_size
+        except (ValueError, OSError):
+            return None
+
+        dtype = self._vector_dtype()
+        if size != offset + count * dim * dtype.itemsize:
+            return None
+        # Vectors written or deleted since (e.g. by freeze --update)
+        if self.get_metadata("vector_sidecar_stamp") != self._vector_stamp():
+            return None
+        if count == 0:
+            return np.empty(0, dtype=np.int64), np.empty((0, dim), dtype=dtype)
+
+        chunk_ids = np.memmap(sidecar, dtype="<i8", mode="r", shape=(count,))
+        matrix = np.memmap(
+            sidecar, dtype=dtype, mode="r", offset=offset, shape=(count, dim)
+        )
+        return chunk_ids, matrix
+
+    def _vector_stamp(self) -> str:
+        """Identify the current set of vectors as "<chunk count>:<max id>".
+
+        Chunk ids only grow, so any update that adds or removes vectors
+        changes the stamp. Both values come from indexes, not a table scan.
+        """
+        with self.connection() as conn:
+            count, max_id = conn.execute(
+                "SELECT (SELECT COUNT(*) FROM chunks), (SELECT MAX(chunk_id) FROM vectors)"
+            ).fetchone()
+        return f"{count}:{max_id or 0}"
+
+    def _load_vector_blobs(self) -> tuple[np.ndarray, np.ndarray]:
+        """Load the ``vectors`` table into a chunk-id array and a matrix."""
+        with self.connection() as conn:
+            rows = conn.execute(
+                "SELECT chunk_id, embedding FROM vectors ORDER BY chunk_id"
+            ).fetchall()
+
+        chunk_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        dtype = self._vector_dtype()
+        if rows:
+            matrix = np.frombuffer(
+                b"".join(row[1] for row in rows), dtype=dtype
+            ).reshape(len(rows), -1)
+        else:
+            matrix = np.empty((0, 0), dtype=dtype)
+        return chunk_ids, matrix
+
+    def _ann_index(self) -> Optional[IVFIndex | BinaryIndex]:
+        """Load the approximate index (cached), or None if the docpack has none."""
+        if not self._ann_loaded:
+            with self._vectors_lock:
+                if not self._ann_loaded:
+                    kind = self.get_metadata("ann_index")
+                    if kind == "ivf":
+                        self._ann = self._load_ivf_index()
+                    elif kind == "binary":
+                        self._ann = self._load_binary_index()
+                    else:
+                        self._ann = None
+                    self._ann_loaded = True
+        return self._ann
+
+    def _load_binary_index(self) -> Optional[BinaryIndex]:
+        """Read the binary codes, aligned with the rows of the vector matrix."""
+        chunk_ids, _ = self.vector_matrix()
+        with self.connection() as conn:
+            rows = conn.execute(
+                "SELECT chunk_id, code FROM binary_codes ORDER BY chunk_id"
+            ).fetchall()
+
+        code_chunk_ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        if not rows or not np.array_equal(code_chunk_ids, chunk_ids):
+            return None  # stale index, fall back to the exact scan
+
+        codes = np.frombuffer(b"".join(r[1] for r in rows), dtype=np.uint8)
+        return BinaryIndex(codes.reshape(len(rows), -1))
+
+    def _load_ivf_index(self) -> Optional[IVFIndex]:
+        """Read the IVF tables, aligned with the rows of the vector matrix."""
+        chunk_ids, _ = self.vector_matrix()
+        with self.connection() as conn:
+            centroids = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT centroid FROM ivf_centroids ORDER BY list_id"
+                )
+            ]
+            lists = conn.execute(
+                "SELECT chunk_id, list_id FROM ivf_lists ORDER BY chunk_id"
+            ).fetchall()
+
+        list_chunk_ids = np.fromiter((r[0] for r in lists), dtype=np.int64, count=len(lists))
+        if not centroids or not np.array_equal(list_chunk_ids, chunk_ids):
+            return None  # stale index, fall back to the exact scan
+
+        return IVFIndex(
+            np.frombuffer(b"".join(centroids), dtype=np.float32).reshape(
+                len(centroids), -1
+            ),
+            np.fromiter((r[1] for r in lists), dtype=np.int32, count=len(lists)),
+        )
+
+    def _chunk_texts(self, chunk_ids: list[int]) -> dict[int, sqlite3.Row]:
+        """Fetch file path and text for the given chunk ids."""
+        if not chunk_ids:
+            return {}
+        placeholders = ",".join("?" * len(chunk_ids))
+        query = f"SELECT * FROM ({self._chunk_rows()}) WHERE id IN ({placeholders})"
+        with self.connection() as conn:
+            rows = conn.execute(query, chunk_ids).fetchall()
+        return {row["id"]: row for row in rows}
+
+    def _chunk_rows(self) -> str:
+        """Return a query of (id, file_path, text) for every chunk."""
+        if self.get_metadata("chunk_storage") == "offsets":
+            return CHUNK_ROWS
+        # Docpacks from before compact storage may lack chunks.file_id
+        return "SELECT c.id AS id, c.file_path AS file_path, c.text AS text FROM chunks c"
+
+
+def _line_index(
+    conn: sqlite3.Connection, path: str, compression: Optional[str]
+) -> Optional[sqlite3.Row]:
+    """Return a text file's rowid and line index (NULL columns if it has none).
+
+    ``compressed`` is set when the content is stored in content_blocks.
+    """
+    if has_table(conn, "line_index"):
+        index_sql = "line_index"
+    else:
+        # Docpacks from before line indexes are read whole
+        index_sql = """(SELECT NULL AS path, NULL AS line_count, NULL AS char_count,
+                               NULL AS step, NULL AS offsets, NULL AS char_offsets)"""
+    return conn.execute(
+        f"""SELECT f.rowid AS rowid, f.content IS NULL AS compressed,
+                   l.line_count, l.char_count, l.step, l.offsets, l.char_offsets
+            FROM files f LEFT JOIN {index_sql} l ON l.path = f.path
+            WHERE f.path = ? AND {_has_content_sql(compression)}""",
+        (path,),
+    ).fetchone()
+
+
+def _has_content_sql(compression: Optional[str]) -> str:
+    """Return a condition on ``files f`` that its text content is stored.
+
+    Takes the docpack's content compression rather than looking it up, so
+    it can be called while holding a pooled connection.
+    """
+    if compression:
+        return """(f.content IS NOT NULL OR EXISTS
+                   (SELECT 1 FROM content_blocks b WHERE b.path = f.path))"""
+    # Docpacks from before compression may lack the content_blocks table
+    return "f.content IS NOT NULL"
+
+
+def _search_like(
+    conn: sqlite3.Connection,
+    chunk_rows: str,
+    terms: list[str],
+    limit: int,
+    match_any: bool,
+) -> list[dict]:
+    """Substring search for docpacks without a full-text index.
+
+    ``chunk_rows`` is the store's chunk query (``DocPackStore._chunk_rows``).
+    """
+    condition = (" OR " if match_any else " AND ").join(
+        ["text LIKE ? ESCAPE '\\'"] * len(terms)
+    )
+    patterns = ["%" + re.sub(r"([%_\\])", r"\\\1", term) + "%" for term in terms]
+    rows = conn.execute(
+        f"SELECT * FROM ({chunk_rows}) WHERE {condition} ORDER BY id LIMIT ?",
+        (*patterns, limit),
+    ).fetchall()
+    return [
+        {
+            "chunk_id": row["id"],
+            "file_path": row["file_path"],
+            "text": row["text"],
+            "score": 0.0,
+        }
+        for row in rows
+    ]
+
+
+def _prefix_range(column: str, prefix: str) -> tuple[str, tuple[str, ...]]:
+    """Return a condition selecting values that start with a prefix.
+
+    A range over the column's index (``>= prefix`` and ``<`` the prefix
+    with its last character incremented); unlike LIKE it is case-sensitive
+    and does not need the case_sensitive_like pragma to use the index.
+    """
+    if not prefix:
+        return "1", ()
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return f"{column} >= ? AND {column} < ?", (prefix, upper)
+
+
+def _level(base: str, path: str) -> int:
+    """Return how many levels below directory ``base`` a path is (1 = child)."""
+    relative = path[len(base) + 1 :] if base else path
+    return relative.count("/") + 1
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set[str]:
+    """Return the column names of a table."""
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _derived_entries(
+    conn: sqlite3.Connection, base: str, depth: int, cursor: Optional[str]
+) -> list[dict]:
+    """Build entries under a directory from file paths alone.
+
+    For docpacks frozen before the directory table existed: every file
+    below the directory is scanned to total up its subdirectories.
+    """
+    condition, params = _prefix_range("path", f"{base}/" if base else "")
+    dirs: dict[str, dict] = {}
+    files = []
+    for row in conn.execute(
+        f"""SELECT path, size_bytes, extension, is_binary FROM files
+            WHERE {condition} ORDER BY path""",
+        params,
+    ):
+        if depth <= 0 or _level(base, row["path"]) <= depth:
+            files.append({"type": "file", **dict(row)})
+        directory = parent_dir(row["path"])
+        while directory != base and (not base or directory.startswith(f"{base}/")):
+            if depth <= 0 or _level(base, directory) <= depth:
+                entry = dirs.setdefault(
+                    directory,
+                    {"type": "dir", "path": directory, "file_count": 0, "total_bytes": 0},
+                )
+                entry["file_count"] += 1
+                entry["total_bytes"] += row["size_bytes"]
+            directory = parent_dir(directory)
+
+    entries = sorted([*dirs.values(), *files], key=lambda entry: entry["path"])
+    if cursor is not None:
+        entries = [entry for entry in entries if entry["path"] > cursor]
+    return entries
+
+
+def _read_blob(
+    conn: sqlite3.Connection, rowid: int, offsets: np.ndarray, first: int, after: int
+) -> bytes:
+    """Read a file's content from line-index checkpoint ``first`` up to ``after``.
+
+    ``after`` past the last checkpoint reads to the end of the content.
+    """
+    with conn.blobopen("files", "content", rowid, readonly=True) as blob:
+        begin = int(offsets[first])
+        stop = int(offsets[after]) if after < len(offsets) else len(blob)
+        blob.seek(begin)
+        return blob.read(stop - begin)
@@ -0,0 +1,478 @@
+"""Single-connection bulk writer for building .docpack files."""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+from docpack.index import VECTOR_DTYPES, quantize
+from docpack.models import Chunk, Document
+from docpack.storage.compression import (
+    CONTENT_COMPRESSIONS,
+    BlockCache,
+    compress,
+    register_content_function,
+    split_blocks,
+)
+from docpack.storage.lines import LINE_INDEX_MIN_BYTES, store_line_index
+from docpack.storage.schema import CHUNK_ROWS, FTS_TABLE, has_table
+
+
+class BulkWriter:
+    """Writes a docpack through one connection and few transactions.
+
+    The per-call methods on DocPackStore open a connection and commit for
+    every write. While freezing, the writer instead keeps one connection
+    with build-time pragmas (no rollback journal, no fsync, large page
+    cache), inserts with executemany, and commits every ``commit_every``
+    files. The output is a build artifact, so a crash mid-freeze means
+    re-running the freeze.
+
+    In compact mode chunks are stored as (file_id, start_char, end_char)
+    only, and their text is sliced from ``files.content`` when read.
+
+    With ``compression`` set, text content is stored as compressed blocks
+    in ``content_blocks`` instead of ``files.content``. Blocks are
+    compressed on a thread pool while the writer moves on, and inserted
+    in order before each commit.
+
+    Chunk text is added to the full-text index as chunks are stored, when
+    the docpack has one.
+
+    Obtain one with ``DocPackStore.bulk_writer()``.
+    """
+
+    DEFAULT_COMMIT_EVERY = 500
+    CACHE_SIZE_KB = 256 * 1024
+    # Blocks being compressed before the writer waits for the oldest
+    MAX_PENDING_BLOCKS = 256
+    # An update VACUUMs (rewriting the whole file) only once at least this
+    # fraction of the pages is free
+    UPDATE_VACUUM_MIN_FREE = 0.25
+
+    def __init__(
+        self,
+        path: Path | str,
+        commit_every: int = DEFAULT_COMMIT_EVERY,
+        journal_mode: str = "OFF",
+        compact: bool = False,
+        compression: Optional[str] = None,
+    ):
+        """Open the writer.
+
+        Args:
+            path: Path to an initialized .docpack file
+            commit_every: Number of files between commits
+            journal_mode: SQLite journal mode while writing ("OFF" or "WAL")
+            compact: Store chunks as offsets into their file's content
+            compression: Compress text content with one of
+                CONTENT_COMPRESSIONS (None stores it as is)
+        """
+        if compression is not None and compression not in CONTENT_COMPRESSIONS:
+            raise ValueError(f"Unknown content compression: {compression}")
+        self.commit_every = commit_every
+        self.journal_mode = journal_mode.upper()
+        self.compact = compact
+        self.compression = compression
+        # One thread at a time, but possibly not the creating one (ThreadedWriter)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(f"PRAGMA journal_mode = {self.journal_mode}")
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.conn.execute(f"PRAGMA cache_size = -{self.CACHE_SIZE_KB}")
+        self.conn.execute("PRAGMA temp_store = MEMORY")
+        self.fts = has_table(self.conn, FTS_TABLE)
+        # Compact chunks of compressed files are sliced by content_slice
+        self._block_cache = BlockCache()
+        register_content_function(self.conn, self._block_cache, compression)
+        self._compressor = ThreadPoolExecutor(os.cpu_count()) if compression else None
+        self._pending: deque[tuple[str, list[Future]]] = deque()
+        self._pending_blocks = 0
+
+        # Chunk ids are assigned here so chunks can be inserted with
+        # executemany and still be returned to the caller.
+        row = self.conn.execute(
+            """SELECT MAX(COALESCE((SELECT MAX(id) FROM chunks), 0),
+                          COALESCE((SELECT seq FROM sqlite_sequence
+                                    WHERE name = 'chunks'), 0))"""
+        ).fetchone()
+        self._next_chunk_id = row[0] + 1
+        row = self.conn.execute("SELECT COALESCE(MAX(file_id), 0) FROM files").fetchone()
+        self._next_file_id = row[0] + 1
+        # Chunks are stored right after their document
+        self._last_file: tuple[Optional[str], int] = (None, 0)
+        self._files_since_commit = 0
+
+    def store_document(self, doc: Document, content_hash: Optional[str] = None) -> None:
+        """Store a document and its metadata."""
+        file_id = self._next_file_id
+        self._next_file_id += 1
+        content = doc.content
+        if self._compressor is not None and content is not None:
+            self.conn.execute("DELETE FROM content_blocks WHERE path = ?", (doc.metadata.path,))
+            blocks = [
+                self._compressor.submit(compress, block, self.compression)
+                for block in split_blocks(content)
+            ]
+            self._pending.append((doc.metadata.path, blocks))
+            self._pending_blocks += len(blocks)
+            while self._pending_blocks > self.MAX_PENDING_BLOCKS:
+                self._write_blocks()
+            content = None
+        self.conn.execute(
+            """INSERT OR REPLACE INTO files
+               (path, content, size_bytes, extension, is_binary, content_hash, mtime,
+                file_id, dir)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                doc.metadata.path,
+                content,
+                doc.metadata.size_bytes,
+                doc.metadata.extension,
+                1 if doc.metadata.is_binary else 0,
+                content_hash,
+                doc.metadata.mtime,
+                file_id,
+                parent_dir(doc.metadata.path),
+            ),
+        )
+        self._last_file = (doc.metadata.path, file_id)
+        self.conn.execute("DELETE FROM line_index WHERE path = ?", (doc.metadata.path,))
+        if doc.content is not None and doc.metadata.size_bytes >= LINE_INDEX_MIN_BYTES:
+            store_line_index(self.conn, doc.metadata.path, doc.content)
+
+    def _write_blocks(self) -> None:
+        """Insert the compressed blocks of the oldest pending file."""
+        path, blocks = self._pending.popleft()
+        self._pending_blocks -= len(blocks)
+        self.conn.executemany(
+            "INSERT INTO content_blocks (path, block, data) VALUES (?, ?, ?)",
+            ((path, block, future.result()) for block, future in enumerate(blocks)),
+        )
+
+    def delete_file(self, path: str) -> None:
+        """Remove a file with its chunks, vectors and index entries."""
+        chunks = """FROM chunks WHERE file_path = ?1
+                    OR file_id = (SELECT file_id FROM files WHERE path = ?1)"""
+        if self.fts:
+            # A contentless FTS5 row is deleted by passing its indexed text
+            self.conn.execute(
+                f"""INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, text)
+                    SELECT 'delete', id, text FROM ({CHUNK_ROWS})
+                    WHERE id IN (SELECT id {chunks})""",
+                (path,),
+            )
+        self.conn.execute(f"DELETE FROM vectors WHERE chunk_id IN (SELECT id {chunks})", (path,))
+        self.conn.execute(f"DELETE FROM ivf_lists WHERE chunk_id IN (SELECT id {chunks})", (path,))
+        self.conn.execute(
+            f"DELETE FROM binary_codes WHERE chunk_id IN (SELECT id {chunks})", (path,)
+        )
+        self.conn.execute(f"DELETE {chunks}", (path,))
+        self.conn.execute("DELETE FROM line_index WHERE path = ?", (path,))
+        self.conn.execute("DELETE FROM content_blocks WHERE path = ?", (path,))
+        self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+        self._block_cache.clear()
+
+    def touch_file(self, path: str, mtime: Optional[float]) -> None:
+        """Update the recorded modification time of an unchanged file."""
+        self.conn.execute("UPDATE files SET mtime = ? WHERE path = ?", (mtime, path))
+
+    def reserve_chunk_ids(self, count: int) -> list[int]:
+        """Allocate ids for chunks that will be stored later."""
+        chunk_ids = list(range(self._next_chunk_id, self._next_chunk_id + count))
+        self._next_chunk_id += count
+        return chunk_ids
+
+    def store_chunks(
+        self, chunks: list[Chunk], chunk_ids: Optional[list[int]] = None
+    ) -> list[int]:
+        """Store chunks and return their IDs.
+
+        Args:
+            chunks: Chunks to store
+            chunk_ids: Ids from reserve_chunk_ids (allocated here if omitted)
+        """
+        if chunk_ids is None:
+            chunk_ids = self.reserve_chunk_ids(len(chunks))
+        if self.fts:
+            self.conn.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, text) VALUES (?, ?)",
+                ((chunk_id, chunk.text) for chunk_id, chunk in zip(chunk_ids, chunks)),
+            )
+        if self.compact:
+            self.conn.executemany(
+                """INSERT INTO chunks (id, file_id, chunk_index, start_char, end_char)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (
+                    (
+                        chunk_id,
+                        self._file_id(chunk.file_path),
+                        chunk.chunk_index,
+                        chunk.start_char,
+                        chunk.end_char,
+                    )
+                    for chunk_id, chunk in zip(chunk_ids, chunks)
+                ),
+            )
+            return chunk_ids
+        self.conn.executemany(
+            """INSERT INTO chunks (id, file_path, chunk_index, text, start_char, end_char)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            (
+                (
+                    chunk_id,
+                    chunk.file_path,
+                    chunk.chunk_index,
+                    chunk.text,
+                    chunk.start_char,
+                    chunk.end_char,
+                )
+                for chunk_id, chunk in zip(chunk_ids, chunks)
+            ),
+        )
+        return chunk_ids
+
+    def _file_id(self, path: str) -> int:
+        """Return the file_id of a stored file."""
+        if path == self._last_file[0]:
+            return self._last_file[1]
+        row = self.conn.execute("SELECT file_id FROM files WHERE path = ?", (path,)).fetchone()
+        if row is None or row[0] is None:
+            raise ValueError(f"Chunks stored before their file: {path}")
+        return row[0]
+
+    def store_embeddings(self, chunk_ids: list[int], embeddings: np.ndarray) -> None:
+        """Store embeddings for chunks."""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        self.conn.executemany(
+            "INSERT INTO vectors (chunk_id, embedding) VALUES (?, ?)",
+            ((chunk_id, emb.tobytes()) for chunk_id, emb in zip(chunk_ids, embeddings)),
+        )
+
+    def set_metadata(self, key: str, value: str) -> None:
+        """Store a metadata key-value pair."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+            (key, value),
+        )
+
+    def quantize_vectors(self, dtype: str) -> int:
+        """Convert float32 embeddings to a reduced-precision storage dtype.
+
+        Embeddings are always written as float32 while freezing and
+        converted here, before finalize compacts the file. The dtype, the
+        vector dimension and (for int8) the per-dimension scales are
+        recorded in metadata. In a docpack that is already quantized only
+        the newly added float32 rows are converted, with the existing scales.
+
+        Args:
+            dtype: One of VECTOR_DTYPES
+
+        Returns:
+            Number of embeddings converted
+        """
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(f"Unknown vector dtype: {dtype}")
+        metadata = dict(
+            self.conn.execute(
+                """SELECT key, value FROM metadata
+                   WHERE key IN ('vector_dtype', 'vector_dim', 'vector_scales')"""
+            ).fetchall()
+        )
+        current = metadata.get("vector_dtype", "float32")
+        if current not in ("float32", dtype):
+            raise ValueError(f"Docpack vectors are {current}, not {dtype}")
+
+        # float32 rows are the ones written since the last conversion
+        rows = self.conn.execute("SELECT chunk_id, embedding FROM vectors").fetchall()
+        if "vector_dim" in metadata:
+            dim = int(metadata["vector_dim"])
+        elif rows:
+            dim = len(rows[0][1]) // 4
+        else:
+            return 0
+        float_rows = [row for row in rows if len(row[1]) == dim * 4]
+        if dtype == "float32" or not float_rows:
+            return 0
+
+        scales = None
+        if "vector_scales" in metadata:
+            scales = np.asarray(json.loads(metadata["vector_scales"]), dtype=np.float32)
+        matrix = np.frombuffer(b"".join(row[1] for row in float_rows), dtype="<f4")
+        quantized, scales = quantize(matrix.reshape(-1, dim), dtype, scales)
+
+        self.conn.executemany(
+            "UPDATE vectors SET embedding = ? WHERE chunk_id = ?",
+            ((q.tobytes(), row[0]) for q, row in zip(quantized, float_rows)),
+        )
+        self.set_metadata("vector_dtype", dtype)
+        self.set_metadata("vector_dim", str(dim))
+        if scales is not None:
+            self.set_metadata("vector_scales", json.dumps(scales.tolist()))
+        return len(float_rows)
+
+    def file_done(self) -> None:
+        """Mark one file as written, committing every ``commit_every`` files."""
+        self._files_since_commit += 1
+        if self._files_since_commit >= self.commit_every:
+            self.commit()
+
+    def commit(self) -> None:
+        """Write pending compressed blocks and commit the current transaction."""
+        while self._pending:
+            self._write_blocks()
+        self.conn.commit()
+        self._files_since_commit = 0
+
+    def build_dirs(self) -> int:
+        """Rebuild the directory table from the stored file paths.
+
+        Also fills ``files.dir`` for files stored by older versions.
+
+        Returns:
+            Number of directories
+        """
+        missing = self.conn.execute("SELECT path FROM files WHERE dir IS NULL").fetchall()
+        self.conn.executemany(
+            "UPDATE files SET dir = ? WHERE path = ?",
+            ((parent_dir(path), path) for (path,) in missing),
+        )
+
+        totals: dict[str, list[int]] = {}
+        for path, size in self.conn.execute("SELECT path, size_bytes FROM files"):
+            directory = parent_dir(path)
+            while directory:
+                total = totals.setdefault(directory, [0, 0])
+                total[0] += 1
+                total[1] += size
+                directory = parent_dir(directory)
+
+        self.conn.execute("DELETE FROM dirs")
+        self.conn.executemany(
+            "INSERT INTO dirs (path, parent, file_count, total_bytes) VALUES (?, ?, ?, ?)",
+            ((path, parent_dir(path), count, size) for path, (count, size) in totals.items()),
+        )
+        return len(totals)
+
+    def finalize(self, vacuum: bool = True, vacuum_min_free: float = 0.0) -> None:
+        """Rebuild directories, commit, refresh planner statistics and compact.
+
+        Args:
+            vacuum: Compact the file with VACUUM
+            vacuum_min_free: Skip the VACUUM unless at least this fraction
+                of the pages is free
+        """
+        self.build_dirs()
+        self.commit()
+        self.conn.execute("ANALYZE")
+        if vacuum and self.free_fraction() >= vacuum_min_free:
+            self.conn.execute("VACUUM")
+        if self.journal_mode == "WAL":
+            # Checkpoint and leave a single self-contained file behind
+            self.conn.execute("PRAGMA journal_mode = DELETE")
+
+    def free_fraction(self) -> float:
+        """Return the fraction of the file's pages that are free."""
+        (pages,) = self.conn.execute("PRAGMA page_count").fetchone()
+        (free,) = self.conn.execute("PRAGMA freelist_count").fetchone()
+        return free / pages if pages else 0.0
+
+    def close(self) -> None:
+        """Close the connection (uncommitted writes are discarded)."""
+        if self._compressor is not None:
+            self._compressor.shutdown(cancel_futures=True)
+        self.conn.close()
+
+
+class ThreadedWriter:
+    """Runs a BulkWriter on a dedicated thread behind a bounded queue.
+
+    Exposes the same write methods as BulkWriter; each call is queued and
+    returns immediately (chunk ids are reserved on the calling thread).
+    Errors raised on the writer thread are re-raised by the next call or
+    by ``close``.
+    """
+
+    def __init__(self, writer: BulkWriter, maxsize: int = 64):
+        """Start the writer thread.
+
+        Args:
+            writer: Writer that performs the SQLite work
+            maxsize: Maximum number of queued operations
+        """
+        self.writer = writer
+        self._queue: queue.Queue[Optional[tuple[str, tuple[Any, ...]]]] = queue.Queue(
+            maxsize
+        )
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="docpack-writer", daemon=True)
+        self._thread.start()
+
+    def store_document(self, doc: Document, content_hash: Optional[str] = None) -> None:
+        """Queue a document for storage."""
+        self._submit("store_document", doc, content_hash)
+
+    def delete_file(self, path: str) -> None:
+        """Queue removal of a file."""
+        self._submit("delete_file", path)
+
+    def touch_file(self, path: str, mtime: Optional[float]) -> None:
+        """Queue an mtime update for an unchanged file."""
+        self._submit("touch_file", path, mtime)
+
+    def store_chunks(self, chunks: list[Chunk]) -> list[int]:
+        """Queue chunks for storage and return their IDs."""
+        chunk_ids = self.writer.reserve_chunk_ids(len(chunks))
+        self._submit("store_chunks", chunks, chunk_ids)
+        return chunk_ids
+
+    def store_embeddings(self, chunk_ids: list[int], embeddings: np.ndarray) -> None:
+        """Queue embeddings for storage."""
+        self._submit("store_embeddings", chunk_ids, embeddings)
+
+    def set_metadata(self, key: str, value: str) -> None:
+        """Queue a metadata key-value pair."""
+        self._submit("set_metadata", key, value)
+
+    def file_done(self) -> None:
+        """Queue the end of a file (for periodic commits)."""
+        self._submit("file_done")
+
+    def close(self) -> None:
+        """Wait for queued operations to be written and stop the thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_error()
+
+    def _submit(self, method: str, *args: Any) -> None:
+        self._raise_error()
+        self._queue.put((method, args))
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise RuntimeError("Writer thread failed") from self._error
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue  # drain the queue so producers never block
+            method, args = item
+            try:
+                getattr(self.writer, method)(*args)
+            except BaseException as e:
+                self._error = e
+
+
+def parent_dir(path: str) -> str:
+    """Return the directory part of a docpack path ("" at the root)."""
+    return path.rpartition("/")[0]
@@ -1,5 +1,6 @@
 """Utility functions for DocPack."""
 
-from docpack.utils.binary import is_binary_content, is_binary_extension
+from docpack.utils.binary import is_binary_content, is_binary_extension, is_binary_file
+from docpack.utils.hashing import content_hash
 
-__all__ = ["is_binary_content", "is_binary_extension"]
+__all__ = ["is_binary_content", "is_binary_extension", "is_binary_file", "content_hash"]
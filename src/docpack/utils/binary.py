@@ -1,7 +1,20 @@
 """Binary file detection utilities."""
 
+import codecs
 from pathlib import Path
 
+# Bytes sampled from the start of a file for content analysis
+SAMPLE_SIZE = 8192
+
+# Printable ASCII + tab, LF, CR
+_TEXT_BYTES = bytes(range(32, 127)) + b"\t\n\r"
+
+# Bytes that can only appear in text as part of a multi-byte UTF-8 sequence
+_HIGH_BYTES = bytes(range(128, 256))
+
+# More than this fraction of non-text bytes marks content as binary
+_NON_TEXT_RATIO = 0.30
+
 # Common binary file extensions
 BINARY_EXTENSIONS = {
     # Images
@@ -28,11 +41,15 @@ def is_binary_extension(path: str | Path) -> bool:
     return Path(path).suffix.lower() in BINARY_EXTENSIONS
 
 
-def is_binary_content(content: bytes, sample_size: int = 8192) -> bool:
+def is_binary_content(content: bytes, sample_size: int = SAMPLE_SIZE) -> bool:
     """Detect if content is binary by checking for null bytes and non-text chars.
 
+    Non-text bytes are counted with a single ``bytes.translate`` over a
+    precomputed table. High bytes are accepted as text when the sample is
+    valid UTF-8, so non-ASCII source text is not misjudged.
+
     Args:
-        content: Raw file content
+        content: Raw file content (the first block of the file is enough)
         sample_size: Number of bytes to sample from the start
 
     Returns:
@@ -48,12 +65,35 @@ def is_binary_content(content: bytes, sample_size: int = 8192) -> bool:
         return True
 
     # Check ratio of non-printable characters
-    # Printable ASCII + common whitespace
-    text_chars = set(range(32, 127)) | {9, 10, 13}  # printable + tab, LF, CR
-    non_text = sum(1 for byte in sample if byte not in text_chars)
+    non_text = len(sample.translate(None, _TEXT_BYTES))
+    if non_text / len(sample) <= _NON_TEXT_RATIO:
+        return False
+
+    # Mostly high bytes: text if they form valid UTF-8 (a sequence cut off
+    # at the end of the sample is allowed), counting only control bytes
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return True
+    controls = len(sample.translate(None, _TEXT_BYTES + _HIGH_BYTES))
+    return (controls / len(sample)) > _NON_TEXT_RATIO
+
+
+def read_sample(path: str | Path, sample_size: int = SAMPLE_SIZE) -> bytes:
+    """Read the first block of a file for content analysis."""
+    with open(path, "rb") as f:
+        return f.read(sample_size)
+
 
-    # If more than 30% non-text, treat as binary
-    return (non_text / len(sample)) > 0.30
+def is_binary_file(path: str | Path) -> bool:
+    """Detect if a file on disk is binary, reading only its first block.
+
+    Raises:
+        OSError: If the file cannot be read
+    """
+    if is_binary_extension(path):
+        return True
+    return is_binary_content(read_sample(path))
 
 
 def detect_binary(path: str | Path, content: bytes) -> bool:
@@ -0,0 +1,8 @@
+"""Content hashing utilities."""
+
+import hashlib
+
+
+def content_hash(content: str) -> str:
+    """Return the hex SHA-256 of text content (UTF-8 encoded)."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
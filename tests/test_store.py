@@ -0,0 +1,90 @@
+"""Tests for the read-only connection pool of DocPackStore."""
+
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from docpack.models import Chunk, Document, FileMetadata
+from docpack.storage import DocPackStore
+
+TEXT = "def parse(data):\n    return data.split()\n\n" * 20
+
+# A deadlocked pool blocks forever, so every call runs with a deadline
+TIMEOUT = 10
+
+
+def _freeze(path: Path, compression: str | None) -> None:
+    """Write a small docpack with one text file."""
+    store = DocPackStore(path)
+    store.initialize()
+    with store.bulk_writer(compression=compression) as writer:
+        if compression:
+            writer.set_metadata("content_compression", compression)
+        doc = Document(
+            metadata=FileMetadata(
+                path="src/parser.py", size_bytes=len(TEXT), extension=".py", is_binary=False
+            ),
+            content=TEXT,
+        )
+        writer.store_document(doc)
+        chunk = Chunk(TEXT, "src/parser.py", 0, 0, len(TEXT))
+        chunk_ids = writer.store_chunks([chunk])
+        writer.store_embeddings(chunk_ids, np.ones((1, 4), dtype=np.float32))
+        writer.file_done()
+
+
+def _call(fn, *args):
+    """Run fn on a thread, failing the test if it does not return in time."""
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(value=fn(*args)), daemon=True)
+    thread.start()
+    thread.join(TIMEOUT)
+    assert not thread.is_alive(), f"{fn.__name__} did not return (pool deadlock)"
+    return result["value"]
+
+
+@pytest.mark.parametrize("compression", [None, "zlib"])
+def test_single_connection_pool(tmp_path, compression):
+    path = tmp_path / "test.docpack"
+    _freeze(path, compression)
+    store = DocPackStore(path, read_only=True, pool_size=1)
+
+    assert _call(store.read_file, "src/parser.py")["content"] == TEXT
+    assert _call(store.file_info, "src/parser.py")["has_content"]
+    assert _call(store.read_range, "src/parser.py", 4, 5)["text"] == "parse"
+    assert _call(store.read_lines, "src/parser.py", 2, 2)["text"] == "    return data.split()\n"
+    results = _call(store.search, "parse")
+    assert [r["file_path"] for r in results] == ["src/parser.py"]
+
+
+def test_nested_connection_reuses_held_connection(tmp_path):
+    path = tmp_path / "test.docpack"
+    _freeze(path, None)
+    store = DocPackStore(path, read_only=True, pool_size=1)
+
+    def nested():
+        with store.connection() as outer:
+            with store.connection() as inner:
+                return inner is outer
+
+    assert _call(nested)
+
+
+def test_concurrent_reads(tmp_path):
+    path = tmp_path / "test.docpack"
+    _freeze(path, "zlib")
+    store = DocPackStore(path, read_only=True)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(store.read_file("src/parser.py")))
+        for _ in range(16)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(TIMEOUT)
+    assert len(results) == 16
+    assert all(r["content"] == TEXT for r in results)